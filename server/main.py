@@ -3,6 +3,7 @@ Underwriting Wizard - FastAPI Backend
 Multi-tenant automated underwriting and CRM integration platform
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
@@ -74,9 +75,21 @@ async def lifespan(app: FastAPI):
         logger.warning(f"⚠️ Database initialization warning: {e}")
         logger.info("Continuing startup without database...")
     
+    try:
+        # Seed the provider connection pool without delaying startup
+        from services.background_checks import background_check_orchestrator
+        app.state.provider_warmup = asyncio.create_task(background_check_orchestrator.warmup())
+    except Exception as e:
+        logger.warning(f"⚠️ Background check warmup skipped: {e}")
+    
     yield
     
     logger.info("🛑 Shutting down backend...")
+    try:
+        from services.background_checks import background_check_orchestrator
+        await background_check_orchestrator.aclose()
+    except Exception as e:
+        logger.warning(f"⚠️ Background check session cleanup failed: {e}")
 
 
 def create_app() -> FastAPI:
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from services.analysis_orchestrator import (
-    parse_bank_pdfs_to_payload, build_monthly_rows, llm_risk_and_summary,
-    compute_cash_pnl, compute_offers, build_clean_scrub_pdf
+    parse_bank_pdfs_to_payload, llm_risk_and_summary,
+    compute_cash_pnl, compute_offers, build_clean_scrub_pdf, redact_many_to_zip,
+    PDF_REDACTION_AVAILABLE,
 )
+from services.bank_monthly import build_monthly_rows
 from services.snapshot_metrics import compute_snapshot
-import tempfile, os
+import asyncio, tempfile, os
 
 router = APIRouter(prefix="/api/analysis", tags=["analysis"])
 
@@ -19,6 +22,37 @@ async def llm_health():
     pack = llm_risk_and_summary(rows)
     return {"ok": True, "sample": pack}
 
+@router.post("/redact-zip")
+async def redact_zip(files: list[UploadFile] = File(...)):
+    if not PDF_REDACTION_AVAILABLE:
+        raise HTTPException(503, "PDF redaction unavailable (PyMuPDF not installed)")
+    # Closed by _chunks once the response is sent, or here if scrubbing fails
+    spool = tempfile.SpooledTemporaryFile(max_size=64 << 20)  # noqa: SIM115
+    try:
+        with tempfile.TemporaryDirectory() as tdir:
+            paths=[]
+            for i, f in enumerate(files):
+                # index prefix: uploads sharing a filename must not overwrite each other
+                p = os.path.join(tdir, f"{i:02d}_{os.path.basename(f.filename or 'uploaded.pdf')}")
+                with open(p, "wb") as w: w.write(await f.read())
+                paths.append(p)
+            # scrubbing is CPU-bound; keep it off the event loop
+            await asyncio.to_thread(redact_many_to_zip, paths, spool)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+
+    def _chunks():
+        try:
+            while chunk := spool.read(1 << 16):
+                yield chunk
+        finally:
+            spool.close()
+
+    return StreamingResponse(_chunks(), media_type="application/zip",
+                             headers={"Content-Disposition": 'attachment; filename="SCRUBBED_STATEMENTS.zip"'})
+
 @router.post("/run")
 async def run_full_analysis(
     merchant_id: str = Form(...),
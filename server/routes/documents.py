@@ -60,7 +60,7 @@ async def upload_bank_statements(
         file_names.append(f.filename)
     
     # Get comprehensive GPT analysis
-    metrics = analyzer.analyze_statements(file_contents, file_names)
+    metrics = await analyzer.analyze_statements_async(file_contents, file_names)
     snap = MetricsSnapshot(deal_id=deal_id, source="statements", payload=metrics)
     db.add(snap)
     db.add(Event(tenant_id=tenant_id, merchant_id=merchant_id, deal_id=deal_id, type="metrics.ready", data_json=json.dumps(metrics)))
@@ -101,7 +101,7 @@ async def parse_bank_statements_simple(
     
     # Analyze bank statements with enhanced PDF parsing + GPT
     analyzer = BankStatementAnalyzer()
-    metrics = analyzer.analyze_statements(file_contents, file_names)
+    metrics = await analyzer.analyze_statements_async(file_contents, file_names)
     
     return {
         "success": True,
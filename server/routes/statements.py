@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import Any, Dict
 from fastapi import APIRouter, Depends, HTTPException, Request, Query, Response
+import os
 import pathlib
 import csv
 import io
@@ -73,17 +74,18 @@ async def parse_statements(
         if not path.exists():
             raise HTTPException(500, f"Stored document {path} not found on disk")
 
-        try:
-            file_contents.append(path.read_bytes())
-            filenames.append(getattr(doc, 'filename', None) or path.name)
-        except Exception as exc:
+        if not os.access(path, os.R_OK):
             doc_filename = getattr(doc, 'filename', None)
-            raise HTTPException(500, f"Unable to read document {doc_filename or doc.id}: {exc}")
+            raise HTTPException(500, f"Unable to read document {doc_filename or doc.id}")
+
+        # Pass the path: the analyzer reads it in place instead of copying it into memory
+        file_contents.append(str(path))
+        filenames.append(getattr(doc, 'filename', None) or path.name)
 
     analyzer = BankStatementAnalyzer()
 
     try:
-        metrics = analyzer.analyze_statements(file_contents, filenames)
+        metrics = await analyzer.analyze_statements_async(file_contents, filenames)
     except Exception as exc:
         raise HTTPException(500, f"Failed to analyze bank statements: {exc}")
 
@@ -105,7 +107,7 @@ def _latest_snapshot(db: Session, deal_id: str):
         raise HTTPException(status_code=404, detail="No metrics snapshot for this deal")
     # payload might be a dict or JSON string depending on model
     payload = snap.payload if isinstance(snap.payload, dict) else json.loads(snap.payload or "{}")
-    return payload
+    return snap.id, payload
 
 
 @router.get("/monthly")
@@ -113,8 +115,8 @@ async def get_monthly_rows(
     deal_id: str = Query(...),
     db: Session = Depends(get_db),
 ):
-    payload = _latest_snapshot(db, deal_id)
-    rows = build_monthly_rows(payload)
+    snap_id, payload = _latest_snapshot(db, deal_id)
+    rows = build_monthly_rows(payload, cache_key=snap_id)
     return {"ok": True, "rows": rows}
 
 
@@ -124,7 +126,7 @@ async def get_transactions(
     db: Session = Depends(get_db),
 ):
     """Get parsed transactions for the bank analysis engine."""
-    payload = _latest_snapshot(db, deal_id)
+    _, payload = _latest_snapshot(db, deal_id)
     transactions = payload.get("transactions", [])
     
     return {
@@ -141,8 +143,8 @@ async def download_monthly_csv(
     deal_id: str = Query(...),
     db: Session = Depends(get_db),
 ):
-    payload = _latest_snapshot(db, deal_id)
-    rows = build_monthly_rows(payload)
+    snap_id, payload = _latest_snapshot(db, deal_id)
+    rows = build_monthly_rows(payload, cache_key=snap_id)
     if not rows:
         raise HTTPException(status_code=404, detail="No data")
 
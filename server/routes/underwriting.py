@@ -11,7 +11,7 @@ from core.database import get_db
 from core.security import verify_partner_key
 from models.deal import Deal
 from models.metrics_snapshot import MetricsSnapshot
-from services.underwriting import underwriting_guardrails, UnderwritingDecision, ViolationSeverity
+from services.underwriting import underwriting_guardrails, UnderwritingDecision
 
 router = APIRouter(prefix="/api/underwriting", tags=["underwriting"])
 
@@ -94,8 +94,8 @@ async def validate_underwriting(
         "ca_compliant": result.ca_compliant,
         "violations": violation_details,
         "reasons": result.reasons,
-        "critical_violations": len([v for v in result.violations if v.severity == ViolationSeverity.CRITICAL]),
-        "warning_violations": len([v for v in result.violations if v.severity == ViolationSeverity.WARNING]),
+        "critical_violations": result.critical_count,
+        "warning_violations": result.warning_count,
         "state": request.state,
         "deal_id": request.deal_id
     }
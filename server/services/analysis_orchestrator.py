@@ -1,18 +1,35 @@
-from typing import Dict, Any, List, Tuple
-import os, re, io, json, math, tempfile, zipfile
-import pdfplumber, fitz
+from typing import Dict, Any, List, Tuple, IO, Optional
+import os, re, json, math, tempfile, zipfile, logging, atexit, threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from decimal import Decimal
 
+try:
+    import orjson
+except Exception:
+    orjson = None
+
 # PyMuPDF optional (for PDF redaction)
 try:
     import fitz  # PyMuPDF
 except Exception:
     fitz = None
+PDF_REDACTION_AVAILABLE = fitz is not None
 
-# OpenAI client (uses Replit-secret OPENAI_API_KEY)
+# OpenAI client (uses Replit-secret OPENAI_API_KEY); one process-wide client
+# over a pooled keep-alive httpx.Client so calls after the first skip TCP+TLS setup
 try:
+    import httpx
     from openai import OpenAI
-    _OPENAI = OpenAI(api_key=os.getenv("OPENAI_API_KEY")) if os.getenv("OPENAI_API_KEY") else None
+    _OPENAI = OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        ),
+    ) if os.getenv("OPENAI_API_KEY") else None
+    if _OPENAI:
+        atexit.register(_OPENAI.close)
 except Exception:
     _OPENAI = None
 
@@ -20,10 +37,9 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "500"))
 OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.2"))
 
-from .bank_monthly import build_monthly_rows
-from services.parsers.extract_any import extract_any_bank_statement
-from services.parsers.totals_any import extract_summary_from_pages
-from services.snapshot_metrics import compute_snapshot
+logger = logging.getLogger(__name__)
+
+from services.parsers.extract_any import extract_any_bank_statements_batch
 
 def _to_money(v) -> float:
     try: return float(Decimal(str(v)))
@@ -35,14 +51,10 @@ def parse_bank_pdfs_to_payload(pdf_paths: List[str]) -> Dict[str, Any]:
     2) Breakouts + (optional) LLM Vision fill for missing pieces.
     """
     statements = []
-    for p in pdf_paths:
+    rows = extract_any_bank_statements_batch(pdf_paths)  # adds breakouts + daily
+    for p, row in zip(pdf_paths, rows):
         fname = os.path.basename(p)
-        # text pages for deterministic total capture
-        texts = []
-        with pdfplumber.open(p) as pdf:
-            for pg in pdf.pages: texts.append(pg.extract_text() or "")
-        det = extract_summary_from_pages(texts)  # no-AI totals
-        row = extract_any_bank_statement(p)      # adds breakouts + daily
+        det = row.pop("summary_totals", None) or {}  # no-AI totals, from the same text pass
         # prefer deterministic totals when present
         for k,v in det.items():
             if v not in (None,""):
@@ -88,6 +100,30 @@ def _extract_balances(text: str):
         daily.append(float(m.group(1).replace(",","")))
     return beg, end, daily
 
+# Month fields the risk prompt is about; everything else (daily ladders, extras) stays server-side
+_LLM_ROW_FIELDS = (
+    "file", "period", "beginning_balance", "ending_balance", "net_change",
+    "total_deposits", "deposit_count", "deposits_from_RADOVANOVIC", "mobile_check_deposits", "wire_credits",
+    "total_withdrawals", "withdrawal_count", "withdrawals_PFSINGLE_PT", "withdrawals_Zelle", "withdrawals_AMEX",
+    "withdrawals_CHASE_CC", "withdrawals_CADENCE_BANK", "withdrawals_SBA_EIDL", "withdrawals_Nav_Technologies",
+    "bank_fees", "min_daily_ending_balance", "max_daily_ending_balance",
+)
+
+def _slim_rows(rows: List[Dict[str,Any]]) -> List[Dict[str,Any]]:
+    """One compact object per month: only prompt-relevant fields, money rounded to cents."""
+    slim = []
+    for r in rows:
+        m = {}
+        for k in _LLM_ROW_FIELDS:
+            v = r.get(k)
+            if v is None: continue
+            m[k] = round(v, 2) if isinstance(v, float) else v
+        daily = r.get("daily_endings_full")
+        if daily:
+            m["negative_days"] = sum(1 for x in daily if _to_money(x) < 0)
+        slim.append(m)
+    return slim
+
 def llm_risk_and_summary(monthly_rows: List[Dict[str,Any]]) -> Dict[str,Any]:
     """Strict JSON: risk_score, risk_flags, pros, cons, follow_up_questions, required_docs, eligibility, reason."""
     if not _OPENAI:
@@ -106,7 +142,7 @@ def llm_risk_and_summary(monthly_rows: List[Dict[str,Any]]) -> Dict[str,Any]:
         }
     sys = "You are an expert MCA underwriter. Be concise, data-grounded, and return strict JSON."
     user = {
-        "months": monthly_rows,
+        "months": _slim_rows(monthly_rows),
         "instructions": {
             "compute": [
                 "risk_score (0-100, 100 worst)",
@@ -119,17 +155,19 @@ def llm_risk_and_summary(monthly_rows: List[Dict[str,Any]]) -> Dict[str,Any]:
             "notes": "Treat 'withdrawals_PFSINGLE_PT' as MCA settlements; exclude 'wire_credits' from normalized revenue."
         }
     }
+    user_json = orjson.dumps(user).decode() if orjson else json.dumps(user, separators=(",", ":"))
+    logger.info("llm_risk_and_summary: %d months, ~%d prompt tokens", len(monthly_rows), (len(sys) + len(user_json)) // 4)
     try:
         resp = _OPENAI.chat.completions.create(
             model=OPENAI_MODEL,
             response_format={"type":"json_object"},
-            messages=[{"role":"system","content":sys},{"role":"user","content":json.dumps(user)}],
+            messages=[{"role":"system","content":sys},{"role":"user","content":user_json}],
             temperature=OPENAI_TEMPERATURE,
             max_tokens=OPENAI_MAX_TOKENS,
         )
         content = resp.choices[0].message.content
         if content:
-            return json.loads(content)
+            return orjson.loads(content) if orjson else json.loads(content)
         else:
             raise Exception("Empty response from OpenAI")
     except Exception:
@@ -192,102 +230,178 @@ def compute_offers(monthly_rows: List[Dict[str,Any]], remit="daily") -> List[Dic
         })
     return offers
 
-def redact_many_to_zip(pdf_paths: List[str]) -> bytes:
+# google-re2 (optional) gives the page-level PII scan guaranteed linear-time
+# matching; patterns must stay RE2-compatible (no backreferences/lookarounds)
+# and use inline (?i) since re2 has no flag constants.
+try:
+    import re2 as _rx
+except Exception:
+    _rx = re
+
+# Generic PII patterns: account/routing, SSN, emails, phone
+_PII_PATTERNS = [_rx.compile("(?i)" + p) for p in (
+    r"Routing\s*Number[:\s]*\d{7,13}",
+    r"Account\s*Number[:\s]*\d{6,14}",
+    r"\b\d{3}-\d{2}-\d{4}\b",                         # SSN-like
+    r"\b(?:[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})\b", # email
+    r"\b\d{3}[-.\s]?\d{2,3}[-.\s]?\d{4}\b",           # phone
+)]
+
+# Long number runs (cards/accts): one linear scan for digit runs with single
+# space/dash separators, then keep the 13-19 digit ones in Python.
+_DIGITRUN = _rx.compile(r"\b\d(?:[ -]?\d){12,}\b")
+_DIGITRUN_LONG = _rx.compile(r"\b(?:\d[ -]?){13,19}\b")  # only re-run inside runs over 19 digits
+_SEPARATORS = str.maketrans("", "", " -")
+
+# Cheap necessary condition for any hit above: the routing/account labels, an
+# email '@', or four digits with at most single space/dash separators (every
+# SSN, phone and long digit run contains one). Pages failing it skip the scan.
+_PII_PREFILTER = _rx.compile(r"(?i)account|routing|@|\d[ -]?\d[ -]?\d[ -]?\d")
+
+def _long_digit_runs(text: str):
+    for m in _DIGITRUN.finditer(text):
+        run = m.group(0)
+        digits = run.translate(_SEPARATORS)
+        if len(digits) <= 19:
+            yield run
+        elif digits != run:
+            # separated groups, e.g. a card number followed by another number
+            for sub in _DIGITRUN_LONG.finditer(run):
+                yield sub.group(0).rstrip(" -")
+
+def _pii_hits(text: str):
+    for rx in _PII_PATTERNS:
+        for m in rx.finditer(text):
+            yield m.group(0)
+    yield from _long_digit_runs(text)
+
+# PDFs at least this long are scrubbed in page ranges across worker processes
+SCRUB_PARALLEL_MIN_PAGES = int(os.getenv("SCRUB_PARALLEL_MIN_PAGES", "24"))
+SCRUB_WORKERS = int(os.getenv("SCRUB_WORKERS", str(os.cpu_count() or 1)))
+
+# One pool for the process, started on first use. Spawned, not forked: the
+# caller is a request thread inside a multi-threaded server, and forking
+# there can copy a held lock into the child
+_SCRUB_POOL: Optional[ProcessPoolExecutor] = None
+_SCRUB_POOL_LOCK = threading.Lock()
+
+def _scrub_pool() -> ProcessPoolExecutor:
+    global _SCRUB_POOL
+    with _SCRUB_POOL_LOCK:
+        if _SCRUB_POOL is None:
+            _SCRUB_POOL = ProcessPoolExecutor(max_workers=SCRUB_WORKERS, mp_context=get_context("spawn"))
+            atexit.register(_SCRUB_POOL.shutdown, cancel_futures=True)
+        return _SCRUB_POOL
+
+def _scrub_page(page) -> None:
+    text = page.get_text("text")  # type: ignore
+    if not _PII_PREFILTER.search(text):
+        return
+    # clean white fill (no black boxes)
+    # search_for already returns every occurrence on the page, so look each
+    # distinct substring up once (repeated account numbers, SSN==phone hits)
+    for hit in dict.fromkeys(_pii_hits(text)):
+        for rect in page.search_for(hit):  # type: ignore
+            page.add_redact_annot(rect, fill=(1,1,1))  # type: ignore
+    page.apply_redactions()  # type: ignore
+
+def _scrub_page_range(job: Tuple[str, int, int]) -> bytes:
+    """Worker: scrub pages [start, stop) of one PDF, returned as a standalone PDF."""
+    path, start, stop = job
+    doc = fitz.open(path)  # type: ignore
+    try:
+        doc.select(list(range(start, stop)))  # type: ignore
+        for page in doc:
+            _scrub_page(page)
+        return doc.tobytes()  # type: ignore
+    finally:
+        doc.close()  # type: ignore
+
+def _scrub_pdf(path: str):
+    """Open and scrub one PDF, returning the in-memory document.
+    MuPDF is not thread-safe (and holds the GIL), so long PDFs are split into
+    page ranges that run in separate processes and are merged back in order."""
+    doc = fitz.open(path)  # type: ignore
+    n = doc.page_count
+    workers = min(SCRUB_WORKERS, n // max(1, SCRUB_PARALLEL_MIN_PAGES // 2))
+    if n < SCRUB_PARALLEL_MIN_PAGES or workers < 2:
+        for page in doc:
+            _scrub_page(page)
+        return doc
+    doc.close()
+    step = -(-n // workers)
+    jobs = [(path, i, min(i + step, n)) for i in range(0, n, step)]
+    merged = fitz.open()  # type: ignore
+    for part in _scrub_pool().map(_scrub_page_range, jobs):
+        with fitz.open("pdf", part) as d:  # type: ignore
+            merged.insert_pdf(d)  # type: ignore
+    return merged
+
+def redact_many_to_zip(pdf_paths: List[str], out: Optional[IO[bytes]] = None) -> Optional[bytes]:
+    """Scrub each PDF and write them as one ZIP into `out` (file or HTTP stream)
+    and return None. Without `out`, the ZIP is spooled (RAM up to 64MB, then
+    disk) and returned as bytes."""
     if not fitz:
-        return b""  # redaction not available; caller should skip
+        return b"" if out is None else None  # redaction not available; caller should skip
+    if out is None:
+        with tempfile.SpooledTemporaryFile(max_size=64 << 20) as spool:
+            redact_many_to_zip(pdf_paths, spool)
+            spool.seek(0)
+            return spool.read()
     with tempfile.TemporaryDirectory() as tdir:
         out_paths=[]
         for p in pdf_paths:
             out_p = os.path.join(tdir, f"SCRUBBED_{os.path.basename(p)}")
             try:
-                doc = fitz.open(p)  # type: ignore
-                for page in doc:
-                    text = page.get_text("text")  # type: ignore
-                    # Generic PII patterns: account/routing, SSN, emails, phone, full card numbers
-                    patterns = [
-                        r"Routing\s*Number[:\s]*\d{7,13}",
-                        r"Account\s*Number[:\s]*\d{6,14}",
-                        r"\b\d{3}-\d{2}-\d{4}\b",                         # SSN-like
-                        r"\b(?:[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})\b", # email
-                        r"\b\d{3}[-.\s]?\d{2,3}[-.\s]?\d{4}\b",           # phone
-                        r"\b(?:\d[ -]?){13,19}\b"                         # long number runs (cards/accts)
-                    ]
-                    # clean white fill (no black boxes)
-                    for pat in patterns:
-                        for m in re.finditer(pat, text, re.I):
-                            for rect in page.search_for(m.group(0)):  # type: ignore
-                                page.add_redact_annot(rect, fill=(1,1,1))  # type: ignore
-                    page.apply_redactions()  # type: ignore
+                doc = _scrub_pdf(p)
                 doc.save(out_p, deflate=True, garbage=4)  # type: ignore
+                doc.close()  # type: ignore
                 out_paths.append(out_p)
             except Exception:
                 out_paths.append(p)
-        mem = io.BytesIO()
-        with zipfile.ZipFile(mem, 'w', zipfile.ZIP_DEFLATED) as z:
+        # stream straight into `out`; no in-memory copy of the archive
+        with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as z:
             for p in out_paths:
                 z.write(p, arcname=os.path.basename(p))
-        return mem.getvalue()
+    return None
 
 def build_clean_scrub_pdf(pdf_paths: List[str], snapshot: Dict[str,Any]) -> bytes:
     """Create a single PDF: page 1 = neat snapshot table, followed by all scrubbed pages."""
     if not fitz:
         return b""
-    # First, scrub originals (white fill)
-    with tempfile.TemporaryDirectory() as tdir:
-        cleaned=[]
-        for p in pdf_paths:
-            out_p = os.path.join(tdir, f"SCRUB_{os.path.basename(p)}")
-            try:
-                doc = fitz.open(p)  # type: ignore
-                for page in doc:
-                    text = page.get_text("text")  # type: ignore
-                    pats = [
-                        r"Routing\s*Number[:\s]*\d{7,13}",
-                        r"Account\s*Number[:\s]*\d{6,14}",
-                        r"\b\d{3}-\d{2}-\d{4}\b",
-                        r"\b(?:[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})\b",
-                        r"\b\d{3}[-.\s]?\d{2,3}[-.\s]?\d{4}\b",
-                        r"\b(?:\d[ -]?){13,19}\b"
-                    ]
-                    for pat in pats:
-                        for m in re.finditer(pat, text, re.I):
-                            for rect in page.search_for(m.group(0)):  # type: ignore
-                                page.add_redact_annot(rect, fill=(1,1,1))  # type: ignore
-                    page.apply_redactions()  # type: ignore
-                doc.save(out_p, deflate=True, garbage=4)  # type: ignore
-                cleaned.append(out_p)
-            except Exception:
-                cleaned.append(p)
-        # Create a one-page summary
-        summary = fitz.open()  # type: ignore
-        page = summary.new_page(width=612, height=792)  # type: ignore # Letter
-        title = "Scrub Snapshot"
-        labels = [
-            ("Avg Deposit Amount", f"${snapshot['avg_deposit_amount']:,}"),
-            ("Other Advances",     f"${snapshot['other_advances']:,}"),
-            ("Transfer Amount",    f"${snapshot['transfer_amount']:,}"),
-            ("Misc Deduction",     f"${snapshot['misc_deduction']:,}"),
-            ("Number of Deposits", f"{snapshot['number_of_deposits']:,}"),
-            ("Negative Days",      f"{snapshot['negative_days']:,}"),
-            ("Avg Daily Balance",  f"${snapshot['avg_daily_balance']:,}"),
-            ("Avg Beginning Balance", f"${snapshot['avg_beginning_balance']:,}"),
-            ("Avg Ending Balance", f"${snapshot['avg_ending_balance']:,}"),
-        ]
-        page.insert_textbox((36,36,576,90), title, fontsize=18, fontname="helv", align=0)  # type: ignore
-        y=110
-        for i,(k,v) in enumerate(labels):
-            col = 36 if (i%2==0) else 320
-            if i%2==0 and i>0: y += 36
-            page.insert_textbox((col,y,col+250,y+16), k, fontsize=10, color=(0.3,0.35,0.4))  # type: ignore
-            page.insert_textbox((col,y+14,col+250,y+34), v, fontsize=14, color=(0,0,0))  # type: ignore
-        # Append cleaned originals
-        merged = fitz.open()  # type: ignore
-        merged.insert_pdf(summary)  # type: ignore
-        for p in cleaned:
+    # Create a one-page summary
+    summary = fitz.open()  # type: ignore
+    page = summary.new_page(width=612, height=792)  # type: ignore # Letter
+    title = "Scrub Snapshot"
+    labels = [
+        ("Avg Deposit Amount", f"${snapshot['avg_deposit_amount']:,}"),
+        ("Other Advances",     f"${snapshot['other_advances']:,}"),
+        ("Transfer Amount",    f"${snapshot['transfer_amount']:,}"),
+        ("Misc Deduction",     f"${snapshot['misc_deduction']:,}"),
+        ("Number of Deposits", f"{snapshot['number_of_deposits']:,}"),
+        ("Negative Days",      f"{snapshot['negative_days']:,}"),
+        ("Avg Daily Balance",  f"${snapshot['avg_daily_balance']:,}"),
+        ("Avg Beginning Balance", f"${snapshot['avg_beginning_balance']:,}"),
+        ("Avg Ending Balance", f"${snapshot['avg_ending_balance']:,}"),
+    ]
+    page.insert_textbox((36,36,576,90), title, fontsize=18, fontname="helv", align=0)  # type: ignore
+    y=110
+    for i,(k,v) in enumerate(labels):
+        col = 36 if (i%2==0) else 320
+        if i%2==0 and i>0: y += 36
+        page.insert_textbox((col,y,col+250,y+16), k, fontsize=10, color=(0.3,0.35,0.4))  # type: ignore
+        page.insert_textbox((col,y+14,col+250,y+34), v, fontsize=14, color=(0,0,0))  # type: ignore
+    merged = fitz.open()  # type: ignore
+    merged.insert_pdf(summary)  # type: ignore
+    summary.close()  # type: ignore
+    # Scrub originals (white fill) in memory and append them directly
+    for p in pdf_paths:
+        try:
+            d = _scrub_pdf(p)
+        except Exception:
             d = fitz.open(p)  # type: ignore
-            merged.insert_pdf(d)  # type: ignore
-            d.close()  # type: ignore
-        out_bytes = merged.tobytes(deflate=True)  # type: ignore
-        summary.close()  # type: ignore
-        return out_bytes
-
+        merged.insert_pdf(d)  # type: ignore
+        d.close()  # type: ignore
+    out_bytes = merged.tobytes(deflate=True, garbage=4)  # type: ignore
+    merged.close()  # type: ignore
+    return out_bytes
@@ -1,14 +1,28 @@
 """Background check services with flag-only responses for compliance."""
 
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
 from enum import Enum
+import hashlib
 import json
-import uuid
-from datetime import datetime
+import random
+import time
+from secrets import token_urlsafe
+from datetime import datetime, timezone
 import asyncio
 import aiohttp
 
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+try:
+    import ijson
+except Exception:
+    ijson = None
+
 
 class BackgroundCheckFlag(Enum):
     """Flag types for background check results."""
@@ -17,6 +31,20 @@ class BackgroundCheckFlag(Enum):
     DECLINED = "declined"
     ERROR = "error"
     PENDING = "pending"
+    SKIPPED = "skipped"  # not run: an earlier check already declined
+
+
+# Bound once so hot paths use a global load instead of an enum attribute lookup
+_CLEAR = BackgroundCheckFlag.CLEAR
+_REVIEW = BackgroundCheckFlag.REVIEW_REQUIRED
+_DECLINED = BackgroundCheckFlag.DECLINED
+_ERROR = BackgroundCheckFlag.ERROR
+_PENDING = BackgroundCheckFlag.PENDING
+_SKIPPED = BackgroundCheckFlag.SKIPPED
+
+# Positional flag counting in aggregate_flags
+_FLAG_VALUES = tuple(flag.value for flag in BackgroundCheckFlag)
+_FLAG_INDEX = {flag: i for i, flag in enumerate(BackgroundCheckFlag)}
 
 
 class CheckType(Enum):
@@ -28,7 +56,7 @@ class CheckType(Enum):
     SSN_OWNERSHIP = "ssn_ownership"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BackgroundCheckResult:
     """Flag-only result for compliance."""
     check_type: CheckType
@@ -37,9 +65,12 @@ class BackgroundCheckResult:
     checked_at: datetime
     error_message: Optional[str] = None
     confidence: float = 1.0
+    # True when served from the orchestrator cache; checked_at is then the
+    # time of the original provider call
+    cached: bool = False
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PersonIdentity:
     """Person identity for background checks."""
     first_name: str
@@ -50,8 +81,12 @@ class PersonIdentity:
     email: Optional[str] = None
     phone: Optional[str] = None
 
+    def to_payload(self, fields: Tuple[str, ...]) -> Dict[str, Optional[str]]:
+        """Provider request body with just ``fields``, in that order."""
+        return {name: getattr(self, name) for name in fields}
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BusinessIdentity:
     """Business identity for ownership verification."""
     legal_name: str
@@ -60,254 +95,407 @@ class BusinessIdentity:
     formation_date: Optional[str] = None
 
 
-class ClearService:
-    """CLEAR identity and criminal background check service."""
-    
-    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://api.clear.com/v1"):
+# Mock-mode sentinels (matched against lower-cased names / SSN last four)
+_CRIMINAL_LASTNAMES = frozenset({"criminal", "felon"})
+_REVIEW_LASTNAMES = frozenset({"minor", "misdemeanor"})
+_COURT_REVIEW = frozenset({"lawsuit", "litigation"})
+_COURT_DECLINE = frozenset({"judgment", "bankruptcy"})
+_BAD_SSN4 = frozenset({"0000", "1234"})
+
+
+_RETRY_ATTEMPTS = 3
+# Provider checks are non-idempotent (and billed) POSTs: only statuses that
+# mean the request was not processed are retried. A 500/502/504 may come
+# after the provider ran the check, so retrying could run it twice
+_RETRY_STATUSES = frozenset({429, 503})
+_RETRY_MAX_DELAY = 5.0
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a numeric Retry-After header, capped; None if absent/unparseable."""
+    try:
+        return min(max(float(value), 0.0), _RETRY_MAX_DELAY)
+    except (TypeError, ValueError):
+        return None
+
+
+async def _read_fields(response: aiohttp.ClientResponse, fields: Tuple[str, ...]) -> Dict:
+    """Pull only the named top-level scalars out of a JSON body as it streams in."""
+    found: Dict = {}
+    async for prefix, event, value in ijson.parse_async(response.content, use_float=True):
+        if prefix in fields and event in ("number", "string", "boolean", "null"):
+            found[prefix] = value
+            if len(found) == len(fields):
+                break
+    # Skip parsing the rest but still read it off the wire: a connection with
+    # unread body is closed on release instead of going back to the pool
+    while await response.content.readany():
+        pass
+    return found
+
+
+async def _safe(
+    check_type: CheckType,
+    coro: Awaitable[BackgroundCheckResult],
+    checked_at: datetime
+) -> BackgroundCheckResult:
+    """Await one provider check, turning an unexpected exception into an ERROR result."""
+    try:
+        return await coro
+    except Exception as e:
+        return BackgroundCheckResult(
+            check_type=check_type,
+            flag=_ERROR,
+            reference_id=token_urlsafe(16),
+            checked_at=checked_at,
+            error_message=str(e),
+            confidence=0.0
+        )
+
+
+SessionGetter = Callable[[], Awaitable[aiohttp.ClientSession]]
+
+
+class _ProviderService:
+    """Base for provider APIs; uses the injected shared session, else its own."""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str,
+        session: Optional[SessionGetter] = None,
+        concurrency: int = 8
+    ):
         self.api_key = api_key
         self.base_url = base_url
         self.mock_mode = api_key is None or api_key == "development-key"
+        # Built once; passed by reference on every request
+        self._headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if api_key:
+            self._headers["Authorization"] = f"Bearer {api_key}"
+        self._shared_session = session
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Gates the network round-trip itself, so bulk onboarding cannot
+        # flood a provider (429s) or drain the connector pool. Built per event
+        # loop on first use: asyncio primitives bind to the loop that uses them
+        self.concurrency = concurrency
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._sem_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.concurrency)
+            self._sem_loop = loop
+        return self._sem
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._shared_session is not None:
+            return await self._shared_session()
+        # Created lazily: sessions must be built inside a running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=15),
+            )
+        return self._session
+
+    async def _post(
+        self,
+        path: str,
+        payload: Dict,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[int, Dict]:
+        """POST ``payload`` to ``path``; returns ``(status, json_body)``.
+
+        With ``fields`` (and ijson installed) a 200 body is stream-parsed and
+        only those top-level keys are returned.
+        """
+        session = await self._get_session()
+        sem = self._semaphore()
+        body = orjson.dumps(payload) if orjson else json.dumps(payload).encode()
+        url = f"{self.base_url}{path}"
+        # 429/503 and dropped connections are retried with jittered
+        # backoff (or the provider's Retry-After); the semaphore is released
+        # while waiting
+        for attempt in range(_RETRY_ATTEMPTS):
+            last_attempt = attempt == _RETRY_ATTEMPTS - 1
+            delay = None
+            try:
+                async with sem, session.post(url, data=body, headers=self._headers) as response:
+                    if last_attempt or response.status not in _RETRY_STATUSES:
+                        if fields and ijson is not None and response.status == 200:
+                            return response.status, await _read_fields(response, fields)
+                        raw = await response.read()
+                        return response.status, (orjson.loads(raw) if orjson else json.loads(raw))
+                    delay = _retry_after(response.headers.get("Retry-After"))
+            except aiohttp.ClientConnectionError:
+                if last_attempt:
+                    raise
+            if delay is None:
+                delay = min(2 ** attempt + random.random() * 0.2, _RETRY_MAX_DELAY)
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        """Close the service's own session (a shared one belongs to its owner)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class ClearService(_ProviderService):
+    """CLEAR identity and criminal background check service."""
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.clear.com/v1",
+        session: Optional[SessionGetter] = None,
+        concurrency: int = 8
+    ):
+        super().__init__(api_key, base_url, session, concurrency)
     
-    async def identity_verification(self, person: PersonIdentity) -> BackgroundCheckResult:
+    async def identity_verification(
+        self,
+        person: PersonIdentity,
+        checked_at: Optional[datetime] = None
+    ) -> BackgroundCheckResult:
         """Verify identity through CLEAR."""
-        reference_id = str(uuid.uuid4())
+        reference_id = token_urlsafe(16)
+        checked_at = checked_at or datetime.now(timezone.utc)
         
         if self.mock_mode:
             # Mock identity verification logic
-            if person.first_name.lower() == "test" or person.last_name.lower() == "declined":
-                flag = BackgroundCheckFlag.DECLINED
-            elif person.first_name.lower() == "review":
-                flag = BackgroundCheckFlag.REVIEW_REQUIRED
+            fn = person.first_name.lower()
+            if fn == "test" or person.last_name.lower() == "declined":
+                flag = _DECLINED
+            elif fn == "review":
+                flag = _REVIEW
             else:
-                flag = BackgroundCheckFlag.CLEAR
+                flag = _CLEAR
             
             return BackgroundCheckResult(
                 check_type=CheckType.CLEAR_IDENTITY,
                 flag=flag,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 confidence=0.95
             )
         
         # Real CLEAR API integration (flag-only response)
         try:
-            payload = {
-                "first_name": person.first_name,
-                "last_name": person.last_name,
-                "date_of_birth": person.date_of_birth,
-                "ssn_last4": person.ssn_last4,
-                "email": person.email,
-                "phone": person.phone
-            }
+            payload = person.to_payload(
+                ("first_name", "last_name", "date_of_birth", "ssn_last4", "email", "phone")
+            )
             
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.api_key}"}
-                async with session.post(
-                    f"{self.base_url}/identity/verify", 
-                    json=payload, 
-                    headers=headers
-                ) as response:
-                    result = await response.json()
-                    
-                    # Map CLEAR response to flag-only format
-                    if response.status == 200:
-                        if result.get("verified", False):
-                            flag = BackgroundCheckFlag.CLEAR
-                        else:
-                            flag = BackgroundCheckFlag.REVIEW_REQUIRED
-                    else:
-                        flag = BackgroundCheckFlag.ERROR
-                    
-                    return BackgroundCheckResult(
-                        check_type=CheckType.CLEAR_IDENTITY,
-                        flag=flag,
-                        reference_id=result.get("reference_id", reference_id),
-                        checked_at=datetime.utcnow(),
-                        confidence=result.get("confidence", 0.0)
-                    )
+            status, result = await self._post("/identity/verify", payload)
+            
+            # Map CLEAR response to flag-only format
+            if status == 200:
+                if result.get("verified", False):
+                    flag = _CLEAR
+                else:
+                    flag = _REVIEW
+            else:
+                flag = _ERROR
+                
+            return BackgroundCheckResult(
+                check_type=CheckType.CLEAR_IDENTITY,
+                flag=flag,
+                reference_id=result.get("reference_id", reference_id),
+                checked_at=checked_at,
+                confidence=result.get("confidence", 0.0)
+            )
         
         except Exception as e:
             return BackgroundCheckResult(
                 check_type=CheckType.CLEAR_IDENTITY,
-                flag=BackgroundCheckFlag.ERROR,
+                flag=_ERROR,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 error_message=str(e),
                 confidence=0.0
             )
     
-    async def criminal_background_check(self, person: PersonIdentity) -> BackgroundCheckResult:
+    async def criminal_background_check(
+        self,
+        person: PersonIdentity,
+        checked_at: Optional[datetime] = None
+    ) -> BackgroundCheckResult:
         """Criminal background check through CLEAR."""
-        reference_id = str(uuid.uuid4())
+        reference_id = token_urlsafe(16)
+        checked_at = checked_at or datetime.now(timezone.utc)
         
         if self.mock_mode:
             # Mock criminal background logic
-            if person.last_name.lower() in ["criminal", "felon"]:
-                flag = BackgroundCheckFlag.DECLINED
-            elif person.last_name.lower() in ["minor", "misdemeanor"]:
-                flag = BackgroundCheckFlag.REVIEW_REQUIRED
+            ln = person.last_name.lower()
+            if ln in _CRIMINAL_LASTNAMES:
+                flag = _DECLINED
+            elif ln in _REVIEW_LASTNAMES:
+                flag = _REVIEW
             else:
-                flag = BackgroundCheckFlag.CLEAR
+                flag = _CLEAR
             
             return BackgroundCheckResult(
                 check_type=CheckType.CLEAR_CRIMINAL,
                 flag=flag,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 confidence=0.92
             )
         
         # Real CLEAR criminal check (flag-only response)
         try:
-            payload = {
-                "first_name": person.first_name,
-                "last_name": person.last_name,
-                "date_of_birth": person.date_of_birth,
-                "ssn_last4": person.ssn_last4
-            }
+            payload = person.to_payload(("first_name", "last_name", "date_of_birth", "ssn_last4"))
             
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.api_key}"}
-                async with session.post(
-                    f"{self.base_url}/criminal/check", 
-                    json=payload, 
-                    headers=headers
-                ) as response:
-                    result = await response.json()
-                    
-                    # Map to flag-only format based on CLEAR results
-                    if response.status == 200:
-                        if result.get("clear", True):
-                            flag = BackgroundCheckFlag.CLEAR
-                        elif result.get("review_required", False):
-                            flag = BackgroundCheckFlag.REVIEW_REQUIRED
-                        else:
-                            flag = BackgroundCheckFlag.DECLINED
-                    else:
-                        flag = BackgroundCheckFlag.ERROR
-                    
-                    return BackgroundCheckResult(
-                        check_type=CheckType.CLEAR_CRIMINAL,
-                        flag=flag,
-                        reference_id=result.get("reference_id", reference_id),
-                        checked_at=datetime.utcnow(),
-                        confidence=result.get("confidence", 0.0)
-                    )
+            status, result = await self._post("/criminal/check", payload)
+            
+            # Map to flag-only format based on CLEAR results
+            if status == 200:
+                if result.get("clear", True):
+                    flag = _CLEAR
+                elif result.get("review_required", False):
+                    flag = _REVIEW
+                else:
+                    flag = _DECLINED
+            else:
+                flag = _ERROR
+                
+            return BackgroundCheckResult(
+                check_type=CheckType.CLEAR_CRIMINAL,
+                flag=flag,
+                reference_id=result.get("reference_id", reference_id),
+                checked_at=checked_at,
+                confidence=result.get("confidence", 0.0)
+            )
         
         except Exception as e:
             return BackgroundCheckResult(
                 check_type=CheckType.CLEAR_CRIMINAL,
-                flag=BackgroundCheckFlag.ERROR,
+                flag=_ERROR,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 error_message=str(e),
                 confidence=0.0
             )
 
 
-class NYSCEFService:
+class NYSCEFService(_ProviderService):
     """New York State court records check service."""
     
-    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://api.nyscef.gov/v1"):
-        self.api_key = api_key
-        self.base_url = base_url
-        self.mock_mode = api_key is None or api_key == "development-key"
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.nyscef.gov/v1",
+        session: Optional[SessionGetter] = None,
+        concurrency: int = 8
+    ):
+        super().__init__(api_key, base_url, session, concurrency)
     
-    async def court_records_check(self, person: PersonIdentity) -> BackgroundCheckResult:
+    async def court_records_check(
+        self,
+        person: PersonIdentity,
+        checked_at: Optional[datetime] = None
+    ) -> BackgroundCheckResult:
         """Check NY state court records."""
-        reference_id = str(uuid.uuid4())
+        reference_id = token_urlsafe(16)
+        checked_at = checked_at or datetime.now(timezone.utc)
         
         if self.mock_mode:
             # Mock NY court records logic
-            if person.last_name.lower() in ["lawsuit", "litigation"]:
-                flag = BackgroundCheckFlag.REVIEW_REQUIRED
-            elif person.last_name.lower() in ["judgment", "bankruptcy"]:
-                flag = BackgroundCheckFlag.DECLINED
+            ln = person.last_name.lower()
+            if ln in _COURT_REVIEW:
+                flag = _REVIEW
+            elif ln in _COURT_DECLINE:
+                flag = _DECLINED
             else:
-                flag = BackgroundCheckFlag.CLEAR
+                flag = _CLEAR
             
             return BackgroundCheckResult(
                 check_type=CheckType.NYSCEF_COURT,
                 flag=flag,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 confidence=0.88
             )
         
         # Real NYSCEF API integration (flag-only response)
         try:
-            payload = {
-                "first_name": person.first_name,
-                "last_name": person.last_name,
-                "date_of_birth": person.date_of_birth
-            }
+            payload = person.to_payload(("first_name", "last_name", "date_of_birth"))
             
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.api_key}"}
-                async with session.post(
-                    f"{self.base_url}/records/search", 
-                    json=payload, 
-                    headers=headers
-                ) as response:
-                    result = await response.json()
-                    
-                    # Map to flag-only format
-                    if response.status == 200:
-                        record_count = result.get("record_count", 0)
-                        if record_count == 0:
-                            flag = BackgroundCheckFlag.CLEAR
-                        elif record_count <= 2:
-                            flag = BackgroundCheckFlag.REVIEW_REQUIRED
-                        else:
-                            flag = BackgroundCheckFlag.DECLINED
-                    else:
-                        flag = BackgroundCheckFlag.ERROR
-                    
-                    return BackgroundCheckResult(
-                        check_type=CheckType.NYSCEF_COURT,
-                        flag=flag,
-                        reference_id=result.get("reference_id", reference_id),
-                        checked_at=datetime.utcnow(),
-                        confidence=result.get("confidence", 0.0)
-                    )
+            # Only the count is used; skip materializing large ``records`` arrays
+            status, result = await self._post(
+                "/records/search", payload,
+                fields=("record_count", "reference_id", "confidence")
+            )
+            
+            # Map to flag-only format
+            if status == 200:
+                record_count = result.get("record_count", 0)
+                if record_count == 0:
+                    flag = _CLEAR
+                elif record_count <= 2:
+                    flag = _REVIEW
+                else:
+                    flag = _DECLINED
+            else:
+                flag = _ERROR
+                
+            return BackgroundCheckResult(
+                check_type=CheckType.NYSCEF_COURT,
+                flag=flag,
+                reference_id=result.get("reference_id", reference_id),
+                checked_at=checked_at,
+                confidence=result.get("confidence", 0.0)
+            )
         
         except Exception as e:
             return BackgroundCheckResult(
                 check_type=CheckType.NYSCEF_COURT,
-                flag=BackgroundCheckFlag.ERROR,
+                flag=_ERROR,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 error_message=str(e),
                 confidence=0.0
             )
 
 
-class OwnershipVerificationService:
+class OwnershipVerificationService(_ProviderService):
     """EIN/SSN ownership verification service."""
     
-    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://api.ownership-verify.com/v1"):
-        self.api_key = api_key
-        self.base_url = base_url
-        self.mock_mode = api_key is None or api_key == "development-key"
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.ownership-verify.com/v1",
+        session: Optional[SessionGetter] = None,
+        concurrency: int = 8
+    ):
+        super().__init__(api_key, base_url, session, concurrency)
     
-    async def ein_ownership_check(self, person: PersonIdentity, business: BusinessIdentity) -> BackgroundCheckResult:
+    async def ein_ownership_check(
+        self,
+        person: PersonIdentity,
+        business: BusinessIdentity,
+        checked_at: Optional[datetime] = None
+    ) -> BackgroundCheckResult:
         """Verify EIN ownership."""
-        reference_id = str(uuid.uuid4())
+        reference_id = token_urlsafe(16)
+        checked_at = checked_at or datetime.now(timezone.utc)
         
         if self.mock_mode:
             # Mock EIN ownership logic
             if business.ein and business.ein.endswith("0000"):
-                flag = BackgroundCheckFlag.DECLINED
+                flag = _DECLINED
             elif not business.ein or len(business.ein) != 9:
-                flag = BackgroundCheckFlag.REVIEW_REQUIRED
+                flag = _REVIEW
             else:
-                flag = BackgroundCheckFlag.CLEAR
+                flag = _CLEAR
             
             return BackgroundCheckResult(
                 check_type=CheckType.EIN_OWNERSHIP,
                 flag=flag,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 confidence=0.90
             )
         
@@ -321,62 +509,61 @@ class OwnershipVerificationService:
                 "owner_ssn_last4": person.ssn_last4
             }
             
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.api_key}"}
-                async with session.post(
-                    f"{self.base_url}/ein/verify", 
-                    json=payload, 
-                    headers=headers
-                ) as response:
-                    result = await response.json()
-                    
-                    # Map to flag-only format
-                    if response.status == 200:
-                        if result.get("verified", False):
-                            flag = BackgroundCheckFlag.CLEAR
-                        elif result.get("partial_match", False):
-                            flag = BackgroundCheckFlag.REVIEW_REQUIRED
-                        else:
-                            flag = BackgroundCheckFlag.DECLINED
-                    else:
-                        flag = BackgroundCheckFlag.ERROR
-                    
-                    return BackgroundCheckResult(
-                        check_type=CheckType.EIN_OWNERSHIP,
-                        flag=flag,
-                        reference_id=result.get("reference_id", reference_id),
-                        checked_at=datetime.utcnow(),
-                        confidence=result.get("confidence", 0.0)
-                    )
+            status, result = await self._post("/ein/verify", payload)
+            
+            # Map to flag-only format
+            if status == 200:
+                if result.get("verified", False):
+                    flag = _CLEAR
+                elif result.get("partial_match", False):
+                    flag = _REVIEW
+                else:
+                    flag = _DECLINED
+            else:
+                flag = _ERROR
+                
+            return BackgroundCheckResult(
+                check_type=CheckType.EIN_OWNERSHIP,
+                flag=flag,
+                reference_id=result.get("reference_id", reference_id),
+                checked_at=checked_at,
+                confidence=result.get("confidence", 0.0)
+            )
         
         except Exception as e:
             return BackgroundCheckResult(
                 check_type=CheckType.EIN_OWNERSHIP,
-                flag=BackgroundCheckFlag.ERROR,
+                flag=_ERROR,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 error_message=str(e),
                 confidence=0.0
             )
     
-    async def ssn_ownership_check(self, person: PersonIdentity, business: BusinessIdentity) -> BackgroundCheckResult:
+    async def ssn_ownership_check(
+        self,
+        person: PersonIdentity,
+        business: BusinessIdentity,
+        checked_at: Optional[datetime] = None
+    ) -> BackgroundCheckResult:
         """Verify SSN ownership of business."""
-        reference_id = str(uuid.uuid4())
+        reference_id = token_urlsafe(16)
+        checked_at = checked_at or datetime.now(timezone.utc)
         
         if self.mock_mode:
             # Mock SSN ownership logic
-            if person.ssn_last4 and person.ssn_last4 in ["0000", "1234"]:
-                flag = BackgroundCheckFlag.DECLINED
+            if person.ssn_last4 and person.ssn_last4 in _BAD_SSN4:
+                flag = _DECLINED
             elif not person.ssn_last4:
-                flag = BackgroundCheckFlag.REVIEW_REQUIRED
+                flag = _REVIEW
             else:
-                flag = BackgroundCheckFlag.CLEAR
+                flag = _CLEAR
             
             return BackgroundCheckResult(
                 check_type=CheckType.SSN_OWNERSHIP,
                 flag=flag,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 confidence=0.85
             )
         
@@ -390,40 +577,33 @@ class OwnershipVerificationService:
                 "business_ein": business.ein
             }
             
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Bearer {self.api_key}"}
-                async with session.post(
-                    f"{self.base_url}/ssn/verify", 
-                    json=payload, 
-                    headers=headers
-                ) as response:
-                    result = await response.json()
-                    
-                    # Map to flag-only format
-                    if response.status == 200:
-                        if result.get("verified", False):
-                            flag = BackgroundCheckFlag.CLEAR
-                        elif result.get("partial_match", False):
-                            flag = BackgroundCheckFlag.REVIEW_REQUIRED
-                        else:
-                            flag = BackgroundCheckFlag.DECLINED
-                    else:
-                        flag = BackgroundCheckFlag.ERROR
-                    
-                    return BackgroundCheckResult(
-                        check_type=CheckType.SSN_OWNERSHIP,
-                        flag=flag,
-                        reference_id=result.get("reference_id", reference_id),
-                        checked_at=datetime.utcnow(),
-                        confidence=result.get("confidence", 0.0)
-                    )
+            status, result = await self._post("/ssn/verify", payload)
+            
+            # Map to flag-only format
+            if status == 200:
+                if result.get("verified", False):
+                    flag = _CLEAR
+                elif result.get("partial_match", False):
+                    flag = _REVIEW
+                else:
+                    flag = _DECLINED
+            else:
+                flag = _ERROR
+                
+            return BackgroundCheckResult(
+                check_type=CheckType.SSN_OWNERSHIP,
+                flag=flag,
+                reference_id=result.get("reference_id", reference_id),
+                checked_at=checked_at,
+                confidence=result.get("confidence", 0.0)
+            )
         
         except Exception as e:
             return BackgroundCheckResult(
                 check_type=CheckType.SSN_OWNERSHIP,
-                flag=BackgroundCheckFlag.ERROR,
+                flag=_ERROR,
                 reference_id=reference_id,
-                checked_at=datetime.utcnow(),
+                checked_at=checked_at,
                 error_message=str(e),
                 confidence=0.0
             )
@@ -436,12 +616,158 @@ class BackgroundCheckOrchestrator:
         self, 
         clear_api_key: Optional[str] = None,
         nyscef_api_key: Optional[str] = None,
-        ownership_api_key: Optional[str] = None
+        ownership_api_key: Optional[str] = None,
+        clear_concurrency: int = 8,
+        nyscef_concurrency: int = 4,
+        ownership_concurrency: int = 8,
+        cache_ttl: float = 86400,
+        cache_size: int = 4096,
+        max_inflight: int = 50
     ):
-        self.clear_service = ClearService(clear_api_key)
-        self.nyscef_service = NYSCEFService(nyscef_api_key)
-        self.ownership_service = OwnershipVerificationService(ownership_api_key)
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Admission control for bulk screening: at most _cmax comprehensive
+        # checks run at once, the rest wait (tunable via set_concurrency).
+        # The condition is built per event loop on first use
+        self._admission: Optional[asyncio.Condition] = None
+        self._admission_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight = 0
+        self._cmax = max_inflight
+        # Live CLEAR/REVIEW results by identity hash, for onboarding retries.
+        # Mock, declined and error results are never stored
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, Tuple[float, BackgroundCheckResult]]" = OrderedDict()
+        self.clear_service = ClearService(
+            clear_api_key, session=self._get_session,
+            concurrency=clear_concurrency
+        )
+        self.nyscef_service = NYSCEFService(
+            nyscef_api_key, session=self._get_session,
+            concurrency=nyscef_concurrency
+        )
+        self.ownership_service = OwnershipVerificationService(
+            ownership_api_key, session=self._get_session,
+            concurrency=ownership_concurrency
+        )
+        # CheckType -> provider call taking (person, business, checked_at)
+        self._dispatch: Dict[CheckType, Callable[..., Awaitable[BackgroundCheckResult]]] = {
+            CheckType.CLEAR_IDENTITY: lambda p, b, at: self.clear_service.identity_verification(p, checked_at=at),
+            CheckType.CLEAR_CRIMINAL: lambda p, b, at: self.clear_service.criminal_background_check(p, checked_at=at),
+            CheckType.NYSCEF_COURT: lambda p, b, at: self.nyscef_service.court_records_check(p, checked_at=at),
+            CheckType.EIN_OWNERSHIP: lambda p, b, at: self.ownership_service.ein_ownership_check(p, b, checked_at=at),
+            CheckType.SSN_OWNERSHIP: lambda p, b, at: self.ownership_service.ssn_ownership_check(p, b, checked_at=at),
+        }
+        self._providers = {
+            CheckType.CLEAR_IDENTITY: self.clear_service,
+            CheckType.CLEAR_CRIMINAL: self.clear_service,
+            CheckType.NYSCEF_COURT: self.nyscef_service,
+            CheckType.EIN_OWNERSHIP: self.ownership_service,
+            CheckType.SSN_OWNERSHIP: self.ownership_service,
+        }
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """One process-wide session for all providers: a single connector (pooled
+        per host), DNS cache and SSL context instead of one of each per service."""
+        if self._session is None or self._session.closed:
+            # Three fixed provider hosts: keep their connections alive and
+            # pooled per host, and cache their DNS for ten minutes
+            connector = aiohttp.TCPConnector(
+                limit=64,
+                limit_per_host=16,
+                force_close=False,
+                enable_cleanup_closed=True,
+                ttl_dns_cache=600,
+                use_dns_cache=True,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=15),
+            )
+        return self._session
+
+    async def warmup(self) -> None:
+        """Open a keep-alive connection to each live provider so the first real
+        check skips the TCP/TLS handshake. Failures are ignored."""
+        services = [
+            service
+            for service in (self.clear_service, self.nyscef_service, self.ownership_service)
+            if not service.mock_mode
+        ]
+        if not services:
+            return
+        session = await self._get_session()
+
+        async def ping(service: _ProviderService) -> None:
+            try:
+                async with session.head(
+                    f"{service.base_url}/health",
+                    headers=service._headers,
+                    timeout=aiohttp.ClientTimeout(total=5)
+                ) as response:
+                    await response.read()
+            except Exception:
+                pass
+
+        await asyncio.gather(*(ping(service) for service in services))
+
+    async def aclose(self) -> None:
+        """Close the shared provider session (called on application shutdown)."""
+        await asyncio.gather(
+            self.clear_service.aclose(),
+            self.nyscef_service.aclose(),
+            self.ownership_service.aclose(),
+        )
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
+    def _admission_cond(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._admission_loop is not loop:
+            # Checks admitted on a previous loop can't still be running
+            self._admission = asyncio.Condition()
+            self._admission_loop = loop
+            self._inflight = 0
+        return self._admission
+
+    async def set_concurrency(self, max_inflight: int) -> None:
+        """Change how many comprehensive checks may run at once; takes effect immediately."""
+        cond = self._admission_cond()
+        async with cond:
+            self._cmax = max(1, max_inflight)
+            cond.notify_all()
+
+    @staticmethod
+    def _key(check_type: CheckType, person: PersonIdentity, business: BusinessIdentity) -> bytes:
+        raw = json.dumps([check_type.value, asdict(person), asdict(business)], sort_keys=True)
+        return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[BackgroundCheckResult]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at >= self.cache_ttl:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return result
+
+    def _cacheable(self, result: BackgroundCheckResult) -> bool:
+        # A decline must be re-checked on retry, and mock answers are not
+        # provider answers
+        if result.flag is _ERROR or result.flag is _DECLINED:
+            return False
+        provider = self._providers.get(result.check_type)
+        return provider is not None and not provider.mock_mode
+
+    def _cache_put(self, key: bytes, result: BackgroundCheckResult) -> None:
+        self._cache[key] = (time.monotonic(), result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
     async def run_comprehensive_check(
         self, 
         person: PersonIdentity, 
@@ -459,52 +785,102 @@ class BackgroundCheckOrchestrator:
                 CheckType.SSN_OWNERSHIP
             ]
         
-        tasks = []
+        cond = self._admission_cond()
+        async with cond:
+            await cond.wait_for(lambda: self._inflight < self._cmax)
+            self._inflight += 1
+        try:
+            return await self._run_checks(person, business, check_types)
+        finally:
+            async with cond:
+                self._inflight -= 1
+                cond.notify(1)
+    
+    async def _run_checks(
+        self,
+        person: PersonIdentity,
+        business: BusinessIdentity,
+        check_types: List[CheckType]
+    ) -> List[BackgroundCheckResult]:
+        # One timestamp for the whole run rather than one clock read per result
+        now = datetime.now(timezone.utc)
+        final_results: List[Optional[BackgroundCheckResult]] = [None] * len(check_types)
+        keys = [self._key(check_type, person, business) for check_type in check_types]
+        todo = []
         
-        for check_type in check_types:
-            if check_type == CheckType.CLEAR_IDENTITY:
-                tasks.append(self.clear_service.identity_verification(person))
-            elif check_type == CheckType.CLEAR_CRIMINAL:
-                tasks.append(self.clear_service.criminal_background_check(person))
-            elif check_type == CheckType.NYSCEF_COURT:
-                tasks.append(self.nyscef_service.court_records_check(person))
-            elif check_type == CheckType.EIN_OWNERSHIP:
-                tasks.append(self.ownership_service.ein_ownership_check(person, business))
-            elif check_type == CheckType.SSN_OWNERSHIP:
-                tasks.append(self.ownership_service.ssn_ownership_check(person, business))
+        for i, check_type in enumerate(check_types):
+            cached = self._cache_get(keys[i])
+            if cached is not None:
+                final_results[i] = replace(cached, cached=True)
+                continue
+            dispatch = self._dispatch.get(check_type)
+            if dispatch is None:
+                continue
+            todo.append((i, dispatch))
         
-        # Run all checks concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Any DECLINED decides the application, so stop as soon as one arrives
+        declined = False
+        tasks = {
+            asyncio.create_task(_safe(check_types[i], dispatch(person, business, now), now)): i
+            for i, dispatch in todo
+        }
+        pending = set(tasks)
+        try:
+            while pending and not declined:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i = tasks[task]
+                    result = task.result()
+                    final_results[i] = result
+                    if result.flag is _DECLINED:
+                        declined = True
+                    if self._cacheable(result):
+                        self._cache_put(keys[i], result)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
         
-        # Handle any exceptions
-        final_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                final_results.append(BackgroundCheckResult(
+        # Checks cancelled (or never started) after a decline
+        for i, _ in todo:
+            if final_results[i] is None:
+                final_results[i] = BackgroundCheckResult(
                     check_type=check_types[i],
-                    flag=BackgroundCheckFlag.ERROR,
-                    reference_id=str(uuid.uuid4()),
-                    checked_at=datetime.utcnow(),
-                    error_message=str(result),
+                    flag=_SKIPPED,
+                    reference_id=token_urlsafe(16),
+                    checked_at=now,
+                    error_message="Skipped after a declined check",
                     confidence=0.0
-                ))
-            else:
-                final_results.append(result)
+                )
         
-        return final_results
+        return [result for result in final_results if result is not None]
     
     def aggregate_flags(self, results: List[BackgroundCheckResult]) -> Dict:
         """Aggregate flag-only results for decision making."""
-        flag_counts = {flag.value: 0 for flag in BackgroundCheckFlag}
+        counts = [0] * len(_FLAG_VALUES)
         total_confidence = 0.0
         check_count = 0
+        results_out: List[Optional[Dict]] = [None] * len(results)
         
-        for result in results:
-            flag_counts[result.flag.value] += 1
-            if result.flag != BackgroundCheckFlag.ERROR:
+        # Single pass: counts, confidence and the serialized rows together
+        for i, result in enumerate(results):
+            flag = result.flag
+            flag_value = flag.value
+            counts[_FLAG_INDEX[flag]] += 1
+            # Errors and skipped checks carry no confidence of their own
+            if flag is not _ERROR and flag is not _SKIPPED:
                 total_confidence += result.confidence
                 check_count += 1
+            results_out[i] = {
+                "check_type": result.check_type.value,
+                "flag": flag_value,
+                "reference_id": result.reference_id,
+                "confidence": result.confidence,
+                "error_message": result.error_message,
+                "cached": result.cached
+            }
         
+        flag_counts = dict(zip(_FLAG_VALUES, counts))
         avg_confidence = total_confidence / check_count if check_count > 0 else 0.0
         
         # Determine overall decision
@@ -522,16 +898,7 @@ class BackgroundCheckOrchestrator:
             "flag_summary": flag_counts,
             "checks_completed": len(results),
             "average_confidence": round(avg_confidence, 2),
-            "results": [
-                {
-                    "check_type": result.check_type.value,
-                    "flag": result.flag.value,
-                    "reference_id": result.reference_id,
-                    "confidence": result.confidence,
-                    "error_message": result.error_message
-                }
-                for result in results
-            ]
+            "results": results_out
         }
 
 
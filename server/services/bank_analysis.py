@@ -2,25 +2,335 @@
 
 import os
 import json
+import hashlib
 import re
 import io
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
-from openai import OpenAI
+import mmap
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Union
+import httpx
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
 import pdfplumber
-from decimal import Decimal
+
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+try:
+    from numba import njit
+except Exception:
+    njit = None
 
 # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
 # do not change this unless explicitly requested by the user
 
+# Static prompt text goes first so every request shares the same prefix, which
+# the provider's automatic prompt caching can reuse; per-request data follows
+_GPT_SYSTEM_PROMPT = (
+    "You are a financial analyst specializing in business lending risk assessment "
+    "and bank statement transaction parsing. Analyze bank statement data, parse "
+    "transactions accurately, and provide business insights in JSON format."
+)
+_STATIC_SCHEMA_PROMPT = """Analyze the bank statement data below and provide business insights. Focus on transaction patterns and business cash flow.
+
+Respond in the required JSON schema: business type clues, cash flow patterns (seasonality, trend, consistency), a risk assessment with specific risk flags and strengths found, a lending recommendation (0-1 confidence score, suggested loan amount, brief risk summary) and a cash flow analysis (estimated monthly operating cash flow, working capital trend, liquidity).
+"""
+
+_MULTI_APPLICANT_PROMPT = """
+The data below covers several applicants, each with an "id". Analyze each one
+independently and return one entry per applicant in "results", echoing its "id".
+
+APPLICANTS:
+"""
+
+
+def _strict_object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "object", "properties": properties,
+            "required": list(properties), "additionalProperties": False}
+
+
+_TREND = {"type": "string", "enum": ["improving", "stable", "declining"]}
+_INSIGHT_PROPERTIES = {
+    "business_type_indicators": {"type": "array", "items": {"type": "string"}},
+    "cash_flow_patterns": _strict_object({
+        "seasonality": {"type": "string"},
+        "trend": _TREND,
+        "consistency": {"type": "string", "enum": ["regular", "irregular"]},
+    }),
+    "risk_assessment": _strict_object({
+        "risk_level": {"type": "string", "enum": ["low", "medium", "high"]},
+        "risk_flags": {"type": "array", "items": {"type": "string"}},
+        "positive_indicators": {"type": "array", "items": {"type": "string"}},
+    }),
+    "lending_recommendation": _strict_object({
+        "confidence_score": {"type": "number"},
+        "recommended_amount": {"type": "number"},
+        "risk_comments": {"type": "string"},
+    }),
+    "cash_flow_analysis": _strict_object({
+        "operating_cash_flow": {"type": "number"},
+        "working_capital_trend": _TREND,
+        "liquidity_assessment": {"type": "string", "enum": ["strong", "adequate", "weak"]},
+    }),
+}
+
+# Structured outputs: the API guarantees replies match these schemas, so the
+# prompt no longer spells out the format and malformed JSON can't come back
+_INSIGHTS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "bank_analysis", "strict": True, "schema": _strict_object(_INSIGHT_PROPERTIES)},
+}
+_MULTI_INSIGHTS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "bank_analysis_many", "strict": True, "schema": _strict_object({
+        "results": {"type": "array", "items": _strict_object({"id": {"type": "integer"}, **_INSIGHT_PROPERTIES})},
+    })},
+}
+
+# Shared by every analyzer (routes build one per request); GPT calls in flight
+# are capped to stay inside the account's rate-limit tier. The client's
+# connection pool and the semaphore bind to the event loop that uses them, so
+# both are built per loop on first use
+_ASYNC_CLIENT: Optional[AsyncOpenAI] = None
+_GPT_SEM: Optional[asyncio.Semaphore] = None
+_GPT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+# Attempts after the first on 429s, timeouts, connection errors and 5xx; the SDK
+# backs off exponentially with jitter and honours Retry-After
+_OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+
+def _bind_gpt_loop() -> None:
+    global _ASYNC_CLIENT, _GPT_SEM, _GPT_LOOP
+    loop = asyncio.get_running_loop()
+    if _GPT_LOOP is not loop:
+        _ASYNC_CLIENT = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            max_retries=_OPENAI_MAX_RETRIES,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            ),
+        )
+        _GPT_SEM = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+        _GPT_LOOP = loop
+
+
+def _async_client() -> AsyncOpenAI:
+    _bind_gpt_loop()
+    return _ASYNC_CLIENT
+
+
+def _gpt_semaphore() -> asyncio.Semaphore:
+    _bind_gpt_loop()
+    return _GPT_SEM
+
+
+# Statement parsing patterns, compiled once at import
+_MONTH_RE = re.compile(r'(20\d{2})[_\-](\d{1,2})')
+# One pass over the text; the date alternation covers MM/DD/YYYY, MM/DD and ISO rows
+_TXN_RE = re.compile(
+    r'(\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}/\d{1,2}|\d{4}-\d{2}-\d{2})'
+    r'\s+(.+?)\s+([+-]?\$?[\d,]+\.\d{2})\s+([\d,]+\.\d{2})',
+    re.MULTILINE
+)
+_STRIP = str.maketrans('', '', '$,+')
+_NSF_DESC = re.compile(r'nsf|insufficient|overdraft|od fee|returned', re.IGNORECASE)
+_NSF_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'NSF.*?\$([\d,]+\.\d{2})',
+    r'INSUFFICIENT.*?\$([\d,]+\.\d{2})',
+    r'OVERDRAFT.*?\$([\d,]+\.\d{2})'
+)]
+
+def _dumps_indented(obj: Any) -> str:
+    """Pretty, key-sorted JSON for the GPT context; orjson when available."""
+    if orjson:
+        return orjson.dumps(
+            obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+    return json.dumps(obj, indent=2, sort_keys=True)
+
+
+# Mock fallback ranges: avg revenue, NSF count, negative days, avg/high/low
+# balance (high bounds exclusive), then volatility and deposit frequency
+_RNG = np.random.default_rng()
+_MOCK_INT_LOW = np.array([60000, 0, 0, 15000, 50000, 2000])
+_MOCK_INT_HIGH = np.array([120001, 4, 9, 35001, 100001, 15001])
+_MOCK_UNIFORM_LOW = np.array([0.2, 10.0])
+_MOCK_UNIFORM_HIGH = np.array([0.6, 18.0])
+
+PDF_PARALLEL_MIN_FILES = int(os.getenv("PDF_PARALLEL_MIN_FILES", "4"))
+
+
+# Finished analyses keyed by statement content, so re-uploading the same PDFs
+# skips extraction and the GPT round trip. Stored as JSON so hits hand back a
+# fresh copy the caller is free to mutate.
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", "3600"))
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "256"))
+_ANALYSIS_CACHE: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+
+def _content_key(pdf_contents: List[Union[bytes, str]], filenames: List[str]) -> str:
+    """SHA-256 over each statement's bytes and filename (filenames feed month detection)."""
+    h = hashlib.sha256()
+    for content, filename in zip(pdf_contents, filenames):
+        if isinstance(content, str):
+            with open(content, "rb") as f:
+                digest = hashlib.file_digest(f, "sha256").digest()
+        else:
+            digest = hashlib.sha256(content).digest()
+        h.update(digest)
+        h.update(filename.encode("utf-8", "replace") + b"\0")
+    return h.hexdigest()
+
+
+def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    hit = _ANALYSIS_CACHE.get(key)
+    if hit is None:
+        return None
+    if time.monotonic() - hit[0] > ANALYSIS_CACHE_TTL:
+        _ANALYSIS_CACHE.pop(key, None)
+        return None
+    _ANALYSIS_CACHE.move_to_end(key)
+    return json.loads(hit[1])
+
+
+def _cache_put(key: str, result: Dict[str, Any]) -> None:
+    # A GPT failure downgrades the result; leave it uncached so the next upload retries
+    if os.environ.get("OPENAI_API_KEY") and not result.get("gpt_analysis"):
+        return
+    try:
+        payload = json.dumps(result)
+    except (TypeError, ValueError):
+        return
+    _ANALYSIS_CACHE[key] = (time.monotonic(), payload)
+    _ANALYSIS_CACHE.move_to_end(key)
+    while len(_ANALYSIS_CACHE) > ANALYSIS_CACHE_SIZE:
+        _ANALYSIS_CACHE.popitem(last=False)
+
+
+def _split_amounts_np(amounts: np.ndarray) -> Tuple[int, float, float]:
+    """(deposit count, deposit total, withdrawal total) of a statement's amounts."""
+    deposits = amounts > 0
+    return int(np.count_nonzero(deposits)), float(amounts[deposits].sum()), 0.0 - float(amounts[~deposits].sum())
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _split_amounts_jit(amounts):
+        n_dep = 0
+        sum_dep = 0.0
+        sum_wd = 0.0
+        for a in amounts:
+            if a > 0:
+                sum_dep += a
+                n_dep += 1
+            else:
+                sum_wd -= a
+        return n_dep, sum_dep, sum_wd
+
+    def _split_amounts(amounts: np.ndarray) -> Tuple[int, float, float]:
+        # One sweep instead of a mask plus two masked sums; business accounts
+        # can run to 10k+ transactions a month
+        if not amounts.size:
+            return 0, 0.0, 0.0
+        n_dep, sum_dep, sum_wd = _split_amounts_jit(amounts)
+        return int(n_dep), float(sum_dep), float(sum_wd)
+else:
+    _split_amounts = _split_amounts_np
+
+
+# Both text backends join pages with this and use "\n" line endings, so the
+# line-anchored parsing downstream sees the same text whichever is installed
+_PAGE_SEPARATOR = "\n"
+
+
+def _pdfium_page_text(page: Any) -> str:
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range().replace("\r\n", "\n")
+    finally:
+        textpage.close()
+        page.close()
+
+
+def _plumber_text(pdf: Any) -> str:
+    # Drop each page's char/line caches as soon as its text is out, so peak
+    # memory is one page rather than the whole document
+    parts = []
+    for page in pdf.pages:
+        parts.append(page.extract_text() or "")
+        page.flush_cache()
+        page.close()
+    return _PAGE_SEPARATOR.join(parts)
+
+
+def _extract_text(content: Union[bytes, str]) -> str:
+    """Plain text of every page of a PDF given as bytes or a file path. pdfium
+    extracts text without building pdfplumber's per-character layout objects;
+    pdfplumber is the fallback. Paths are read by pdfium or through an mmap,
+    never copied into a Python bytes object."""
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(content)
+        try:
+            return _PAGE_SEPARATOR.join(_pdfium_page_text(page) for page in pdf)
+        finally:
+            pdf.close()
+    if isinstance(content, str):
+        with open(content, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with pdfplumber.open(mm) as pdf:
+                return _plumber_text(pdf)
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        return _plumber_text(pdf)
+
+
+def _parse_one_pdf(job: Tuple[int, Union[bytes, str], str]) -> Dict[str, Any]:
+    """Extract and parse one statement (process-pool worker)."""
+    i, content, filename = job
+    try:
+        statement_text = _extract_text(content)
+        
+        # Parse key financial data from text
+        return BankStatementAnalyzer._parse_statement_text(statement_text, filename)
+        
+    except Exception as e:
+        print(f"Failed to extract from {filename}: {e}")
+        # Add minimal data structure for failed extractions
+        return {
+            "filename": filename,
+            "month": f"2024-{i+1:02d}",
+            "transactions": [],
+            "amounts": np.empty(0),
+            "balances": np.empty(0),
+            "nsf_fees": 0,
+            "days_negative": 0,
+            "error": str(e)
+        }
+
+
 class BankStatementAnalyzer:
     def __init__(self):
-        self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+        self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=_OPENAI_MAX_RETRIES)
     
-    def analyze_statements(self, pdf_contents: List[bytes], filenames: List[str]) -> Dict[str, Any]:
+    def analyze_statements(self, pdf_contents: List[Union[bytes, str]], filenames: List[str]) -> Dict[str, Any]:
         """Analyze bank statements using PDF parsing + GPT-5 for comprehensive financial metrics."""
         
         try:
+            key = _content_key(pdf_contents, filenames)
+            cached = _cache_get(key)
+            if cached is not None:
+                return cached
+            
             # First, extract text and basic data from PDFs
             extracted_data = self._extract_pdf_data(pdf_contents, filenames)
             
@@ -29,113 +339,246 @@ class BankStatementAnalyzer:
             
             # Use GPT for intelligent interpretation and advanced analysis
             if os.environ.get("OPENAI_API_KEY"):
-                enhanced_analysis = self._enhance_with_gpt(extracted_data, basic_metrics)
-                return enhanced_analysis
+                result = self._enhance_with_gpt(extracted_data, basic_metrics)
             else:
                 # Return calculated metrics with smart estimation
-                return self._finalize_analysis(basic_metrics, extracted_data, gpt_enhanced=False)
+                result = self._finalize_analysis(basic_metrics, extracted_data, gpt_enhanced=False)
+            _cache_put(key, result)
+            return result
                 
         except Exception as e:
             print(f"Analysis failed: {e}")
             # Fallback to mock data on error
             return self._get_mock_analysis(len(pdf_contents))
     
-    def _extract_pdf_data(self, pdf_contents: List[bytes], filenames: List[str]) -> Dict[str, Any]:
-        """Extract text and structured data from PDF bank statements."""
-        extracted_statements = []
+    async def analyze_statements_async(self, pdf_contents: List[Union[bytes, str]], filenames: List[str]) -> Dict[str, Any]:
+        """Async analyze_statements: PDF parsing runs in a worker thread and the GPT call
+        awaits the shared AsyncOpenAI client, so concurrent requests overlap their I/O."""
         
-        for i, content in enumerate(pdf_contents):
+        try:
+            key = await asyncio.to_thread(_content_key, pdf_contents, filenames)
+            cached = _cache_get(key)
+            if cached is not None:
+                return cached
+            
+            extracted_data = await asyncio.to_thread(self._extract_pdf_data, pdf_contents, filenames)
+            basic_metrics = self._calculate_basic_metrics(extracted_data)
+            
+            if os.environ.get("OPENAI_API_KEY"):
+                result = await self._enhance_with_gpt_async(extracted_data, basic_metrics)
+            else:
+                result = self._finalize_analysis(basic_metrics, extracted_data, gpt_enhanced=False)
+            _cache_put(key, result)
+            return result
+                
+        except Exception as e:
+            print(f"Analysis failed: {e}")
+            return self._get_mock_analysis(len(pdf_contents))
+    
+    def analyze_statement_paths(self, paths: List[str]) -> Dict[str, Any]:
+        """analyze_statements for PDFs already on disk. ``analyze_statements`` and
+        ``analyze_statements_async`` also accept paths in place of bytes."""
+        return self.analyze_statements(paths, [os.path.basename(p) for p in paths])
+    
+    def analyze_many(
+        self,
+        batches: List[Tuple[List[bytes], List[str]]],
+        max_items_per_request: int = 4
+    ) -> List[Dict[str, Any]]:
+        """Analyze several applicants' statements, packing up to
+        ``max_items_per_request`` of them into each GPT request so the prompt and
+        round-trip are shared. Returns one analysis per batch, in order.
+        Synchronous (blocking parse and GPT calls): meant for bulk jobs and
+        scripts; from async code run it via ``asyncio.to_thread``."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batches)
+        prepared = {}
+        for i, (pdf_contents, filenames) in enumerate(batches):
             try:
-                with pdfplumber.open(io.BytesIO(content)) as pdf:
-                    statement_text = ""
-                    for page in pdf.pages:
-                        statement_text += page.extract_text() or ""
-                    
-                    # Parse key financial data from text
-                    parsed_data = self._parse_statement_text(statement_text, filenames[i])
-                    extracted_statements.append(parsed_data)
-                    
+                extracted_data = self._extract_pdf_data(pdf_contents, filenames)
+                basic_metrics = self._calculate_basic_metrics(extracted_data)
+                prepared[i] = (extracted_data, basic_metrics, self._collect_transactions(extracted_data))
             except Exception as e:
-                print(f"Failed to extract from {filenames[i]}: {e}")
-                # Add minimal data structure for failed extractions
-                extracted_statements.append({
-                    "filename": filenames[i],
-                    "month": f"2024-{i+1:02d}",
-                    "transactions": [],
-                    "balances": [],
-                    "nsf_fees": 0,
-                    "days_negative": 0,
-                    "error": str(e)
-                })
+                print(f"Analysis failed: {e}")
+                results[i] = self._get_mock_analysis(len(pdf_contents))
+        
+        if not os.environ.get("OPENAI_API_KEY"):
+            for i, (extracted_data, basic_metrics, _) in prepared.items():
+                results[i] = self._finalize_analysis(basic_metrics, extracted_data, gpt_enhanced=False)
+            return results
+        
+        ids = list(prepared)
+        for start in range(0, len(ids), max_items_per_request):
+            chunk = ids[start:start + max_items_per_request]
+            try:
+                insights = self._gpt_insights_many({i: prepared[i] for i in chunk})
+            except Exception as e:
+                print(f"GPT enhancement failed: {e}")
+                insights = {}
+            for i in chunk:
+                extracted_data, basic_metrics, transactions = prepared[i]
+                gpt_insights = insights.get(i, {})
+                results[i] = self._finalize_analysis_with_transactions(
+                    basic_metrics, extracted_data, gpt_insights, transactions, gpt_enhanced=bool(gpt_insights)
+                )
+        return results
+    
+    def _gpt_insights_many(self, items: Dict[int, Tuple[Dict[str, Any], Dict[str, Any], list]]) -> Dict[int, Dict[str, Any]]:
+        """One chat completion for several applicants; returns insights by id."""
+        applicants = [{
+            "id": i,
+            "metrics": basic_metrics,
+            "statements": self._statements_summary(extracted_data),
+            "transaction_count": len(transactions)
+        } for i, (extracted_data, basic_metrics, transactions) in items.items()]
+        context = _STATIC_SCHEMA_PROMPT + _MULTI_APPLICANT_PROMPT + json.dumps(applicants, sort_keys=True)
+        response = self.client.chat.completions.create(**self._gpt_request(context, _MULTI_INSIGHTS_FORMAT))
+        return {
+            int(entry["id"]): entry
+            for entry in self._parse_gpt_response(response).get("results", [])
+            if isinstance(entry, dict) and "id" in entry
+        }
+    
+    def submit_batch(self, jobs: Dict[str, Tuple[List[bytes], List[str]]]) -> str:
+        """Queue GPT analysis for bulk/offline jobs on the OpenAI Batch API (half
+        the price, separate rate limits, results within 24h). ``jobs`` maps a
+        custom id (e.g. deal id) to ``(pdf_contents, filenames)``; returns the batch id.
+        Synchronous, for offline jobs only; not used by the request handlers."""
+        lines = []
+        for custom_id, (pdf_contents, filenames) in jobs.items():
+            extracted_data = self._extract_pdf_data(pdf_contents, filenames)
+            basic_metrics = self._calculate_basic_metrics(extracted_data)
+            transactions = self._collect_transactions(extracted_data)
+            context = self._build_gpt_context_with_transactions(extracted_data, basic_metrics, transactions)
+            lines.append(json.dumps({
+                "custom_id": str(custom_id),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._gpt_request(context)
+            }))
+        
+        batch_file = self.client.files.create(
+            file=("statements.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+    
+    def collect_batch(
+        self,
+        batch_id: str,
+        jobs: Optional[Dict[str, Tuple[List[bytes], List[str]]]] = None,
+        poll_interval: float = 30.0
+    ) -> Dict[str, Dict[str, Any]]:
+        """Wait for a batch from submit_batch and return GPT insights by custom id.
+        Pass the same ``jobs`` to get full analyses instead (metrics are recomputed
+        locally; PDF parsing is deterministic). Blocks the calling thread, sleeping
+        ``poll_interval`` seconds between polls, so never call it on an event loop."""
+        batch = self.client.batches.retrieve(batch_id)
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch_id)
+        
+        insights: Dict[str, Dict[str, Any]] = {}
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                try:
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    insights[record["custom_id"]] = json.loads(content) if content else {}
+                except (KeyError, IndexError, ValueError) as e:
+                    print(f"Batch result for {record.get('custom_id')} unreadable: {e}")
+        
+        if jobs is None:
+            return insights
+        
+        analyses = {}
+        for custom_id, (pdf_contents, filenames) in jobs.items():
+            extracted_data = self._extract_pdf_data(pdf_contents, filenames)
+            basic_metrics = self._calculate_basic_metrics(extracted_data)
+            gpt_insights = insights.get(str(custom_id), {})
+            analyses[custom_id] = self._finalize_analysis_with_transactions(
+                basic_metrics, extracted_data, gpt_insights,
+                self._collect_transactions(extracted_data), gpt_enhanced=bool(gpt_insights)
+            )
+        return analyses
+    
+    def _extract_pdf_data(self, pdf_contents: List[Union[bytes, str]], filenames: List[str]) -> Dict[str, Any]:
+        """Extract text and structured data from PDF bank statements.
+        pdfplumber extraction is CPU-bound, so larger uploads are parsed one
+        file per process; results keep the upload order."""
+        jobs = [(i, content, filenames[i]) for i, content in enumerate(pdf_contents)]
+        workers = min(os.cpu_count() or 1, 4, len(jobs))
+        
+        if len(jobs) < PDF_PARALLEL_MIN_FILES or workers < 2:
+            extracted_statements = [_parse_one_pdf(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                extracted_statements = list(executor.map(_parse_one_pdf, jobs, chunksize=1))
         
         return {
             "statements": extracted_statements,
             "total_months": len(extracted_statements)
         }
     
-    def _parse_statement_text(self, text: str, filename: str) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_statement_text(text: str, filename: str) -> Dict[str, Any]:
         """Parse financial data from bank statement text."""
         transactions = []
+        amounts = []
         balances = []
         nsf_count = 0
         days_negative = 0
         
         # Extract month/date from filename or text
-        month_match = re.search(r'(20\d{2})[_\-](\d{1,2})', filename)
+        month_match = _MONTH_RE.search(filename)
         statement_month = f"{month_match.group(1)}-{month_match.group(2):0>2}" if month_match else "2024-01"
         
         # Find transaction patterns (common formats)
-        transaction_patterns = [
-            r'(\d{1,2}/\d{1,2}/\d{2,4})\s+(.+?)\s+([+-]?\$?[\d,]+\.\d{2})\s+([\d,]+\.\d{2})',
-            r'(\d{1,2}/\d{1,2})\s+(.+?)\s+([+-]?\$?[\d,]+\.\d{2})\s+([\d,]+\.\d{2})',
-            r'(\d{4}-\d{2}-\d{2})\s+(.+?)\s+([+-]?\$?[\d,]+\.\d{2})\s+([\d,]+\.\d{2})'
-        ]
-        
-        for pattern in transaction_patterns:
-            matches = re.findall(pattern, text, re.MULTILINE)
-            for match in matches:
-                date_str, description, amount_str, balance_str = match
+        for match in _TXN_RE.finditer(text):
+            date_str, description, amount_str, balance_str = match.groups()
+            
+            try:
+                # Clean and parse amounts
+                amount = float(amount_str.translate(_STRIP))
+                balance = float(balance_str.translate(_STRIP))
                 
-                try:
-                    # Clean and parse amounts
-                    amount = float(amount_str.replace('$', '').replace(',', '').replace('+', ''))
-                    balance = float(balance_str.replace('$', '').replace(',', ''))
-                    
-                    transactions.append({
-                        "date": date_str,
-                        "description": description.strip(),
-                        "amount": amount,
-                        "balance": balance,
-                        "is_deposit": amount > 0
-                    })
-                    
-                    balances.append(balance)
-                    
-                    # Check for negative balance
-                    if balance < 0:
-                        days_negative += 1
+                transactions.append({
+                    "date": date_str,
+                    "description": description.strip(),
+                    "amount": amount,
+                    "balance": balance
+                })
+                
+                amounts.append(amount)
+                balances.append(balance)
+                
+                # Check for negative balance
+                if balance < 0:
+                    days_negative += 1
+                
+                # Check for NSF/overdraft fees
+                if _NSF_DESC.search(description):
+                    nsf_count += 1
                     
-                    # Check for NSF/overdraft fees
-                    if any(keyword in description.lower() for keyword in 
-                           ['nsf', 'insufficient', 'overdraft', 'od fee', 'returned']):
-                        nsf_count += 1
-                        
-                except ValueError:
-                    continue
+            except ValueError:
+                continue
         
         # Extract key amounts from text patterns
-        nsf_fee_patterns = [
-            r'NSF.*?\$([\d,]+\.\d{2})',
-            r'INSUFFICIENT.*?\$([\d,]+\.\d{2})',
-            r'OVERDRAFT.*?\$([\d,]+\.\d{2})'
-        ]
-        
         total_nsf_amount = 0
-        for pattern in nsf_fee_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in _NSF_PATTERNS:
+            matches = pattern.findall(text)
             for match in matches:
                 try:
-                    total_nsf_amount += float(match.replace(',', ''))
+                    total_nsf_amount += float(match.translate(_STRIP))
                 except ValueError:
                     continue
         
@@ -143,58 +586,58 @@ class BankStatementAnalyzer:
             "filename": filename,
             "month": statement_month,
             "transactions": transactions,
-            "balances": balances,
+            # Parallel float arrays for the metric reductions
+            "amounts": np.asarray(amounts, dtype=np.float64),
+            "balances": np.asarray(balances, dtype=np.float64),
             "nsf_fees": total_nsf_amount,
             "nsf_count": nsf_count,
-            "days_negative": days_negative,
-            "raw_text_sample": text[:2000]  # First 2000 chars for GPT context
+            "days_negative": days_negative
         }
     
     def _calculate_basic_metrics(self, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate comprehensive financial metrics from extracted data."""
         statements = extracted_data["statements"]
+        months_count = len(statements)
         
-        total_deposits = 0
-        total_withdrawals = 0
-        all_balances = []
-        total_nsf_fees = 0
-        total_nsf_count = 0
-        total_days_negative = 0
+        # One pass over the statements: running totals, balance extremes and a
+        # Welford mean/M2 over monthly deposits for the volatility
         monthly_revenues = []
-        
-        for statement in statements:
-            monthly_deposits = 0
-            monthly_withdrawals = 0
-            
-            for transaction in statement.get("transactions", []):
-                amount = transaction["amount"]
-                if amount > 0:  # Deposit
-                    total_deposits += amount
-                    monthly_deposits += amount
-                else:  # Withdrawal
-                    total_withdrawals += abs(amount)
-                    monthly_withdrawals += abs(amount)
-            
-            monthly_revenues.append(monthly_deposits)
-            all_balances.extend(statement.get("balances", []))
-            total_nsf_fees += statement.get("nsf_fees", 0)
-            total_nsf_count += statement.get("nsf_count", 0)
-            total_days_negative += statement.get("days_negative", 0)
-        
-        months_count = len(statements)
-        avg_monthly_revenue = sum(monthly_revenues) / months_count if months_count > 0 else 0
-        avg_daily_balance = sum(all_balances) / len(all_balances) if all_balances else 0
+        total_withdrawals = total_nsf_fees = 0.0
+        total_nsf_count = total_days_negative = total_deposit_transactions = 0
+        balance_sum = 0.0
+        balance_count = 0
+        highest_balance = lowest_balance = None
+        mean = m2 = 0.0
+        for n, s in enumerate(statements, 1):
+            balances = s["balances"]
+            deposit_count, monthly_deposit, monthly_withdrawal = _split_amounts(s["amounts"])
+            monthly_revenues.append(monthly_deposit)
+            total_withdrawals += monthly_withdrawal
+            total_deposit_transactions += deposit_count
+            total_nsf_fees += s.get("nsf_fees", 0)
+            total_nsf_count += s.get("nsf_count", 0)
+            total_days_negative += s.get("days_negative", 0)
+            if balances.size:
+                balance_sum += float(balances.sum())
+                balance_count += balances.size
+                hi, lo = float(balances.max()), float(balances.min())
+                highest_balance = hi if highest_balance is None else max(highest_balance, hi)
+                lowest_balance = lo if lowest_balance is None else min(lowest_balance, lo)
+            delta = monthly_deposit - mean
+            mean += delta / n
+            m2 += delta * (monthly_deposit - mean)
+        
+        total_deposits = sum(monthly_revenues)
+        avg_monthly_revenue = mean if months_count > 0 else 0
+        avg_daily_balance = balance_sum / balance_count if balance_count else 0
         
         # Calculate cash flow volatility (coefficient of variation)
-        if monthly_revenues and avg_monthly_revenue > 0:
-            variance = sum((x - avg_monthly_revenue) ** 2 for x in monthly_revenues) / len(monthly_revenues)
-            volatility = (variance ** 0.5) / avg_monthly_revenue
+        if months_count and avg_monthly_revenue > 0:
+            volatility = (m2 / months_count) ** 0.5 / avg_monthly_revenue
         else:
             volatility = 0.5  # Default moderate volatility
         
         # Deposit frequency (transactions per month)
-        total_deposit_transactions = sum(len([t for t in s.get("transactions", []) if t["amount"] > 0]) 
-                                       for s in statements)
         deposit_frequency = total_deposit_transactions / months_count if months_count > 0 else 0
         
         return {
@@ -205,8 +648,8 @@ class BankStatementAnalyzer:
             "total_nsf_fees": round(total_nsf_fees, 2),
             "total_nsf_count": total_nsf_count,
             "days_negative_balance": total_days_negative,
-            "highest_balance": max(all_balances) if all_balances else 0,
-            "lowest_balance": min(all_balances) if all_balances else 0,
+            "highest_balance": highest_balance if highest_balance is not None else 0,
+            "lowest_balance": lowest_balance if lowest_balance is not None else 0,
             "cash_flow_volatility": round(min(volatility, 1.0), 3),
             "deposit_frequency": round(deposit_frequency, 1),
             "months_analyzed": months_count,
@@ -215,169 +658,105 @@ class BankStatementAnalyzer:
     
     def _enhance_with_gpt(self, extracted_data: Dict[str, Any], basic_metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Use GPT-5 to enhance analysis with business insights and parse individual transactions."""
+        all_transactions = self._collect_transactions(extracted_data)
         try:
-            # Extract all transactions for detailed analysis
-            all_transactions = []
-            for statement in extracted_data["statements"]:
-                for transaction in statement.get("transactions", []):
-                    # Convert to required format
-                    all_transactions.append({
-                        "date": transaction.get("date", "2024-01-01"),
-                        "description": transaction.get("description", ""),
-                        "amount": abs(float(transaction.get("amount", 0))),
-                        "type": "credit" if float(transaction.get("amount", 0)) > 0 else "debit",
-                        "endingBalance": transaction.get("balance"),
-                        "categoryHint": transaction.get("categoryHint")
-                    })
-            
-            # Prepare context for GPT with transaction parsing focus
             context = self._build_gpt_context_with_transactions(extracted_data, basic_metrics, all_transactions)
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial analyst specializing in business lending risk assessment and bank statement transaction parsing. Analyze bank statement data, parse transactions accurately, and provide business insights in JSON format."
-                    },
-                    {
-                        "role": "user",
-                        "content": context
-                    }
-                ],
-                response_format={"type": "json_object"}
-            )
-            
-            gpt_content = response.choices[0].message.content
-            if gpt_content:
-                gpt_insights = json.loads(gpt_content)
-            else:
-                gpt_insights = {}
+            response = self.client.chat.completions.create(**self._gpt_request(context))
+            gpt_insights = self._parse_gpt_response(response)
             
             # Merge GPT insights with calculated metrics and include transactions
             return self._finalize_analysis_with_transactions(basic_metrics, extracted_data, gpt_insights, all_transactions, gpt_enhanced=True)
             
         except Exception as e:
             print(f"GPT enhancement failed: {e}")
-            # Still extract transactions for fallback
-            all_transactions = []
-            for statement in extracted_data["statements"]:
-                for transaction in statement.get("transactions", []):
-                    all_transactions.append({
-                        "date": transaction.get("date", "2024-01-01"),
-                        "description": transaction.get("description", ""),
-                        "amount": abs(float(transaction.get("amount", 0))),
-                        "type": "credit" if float(transaction.get("amount", 0)) > 0 else "debit",
-                        "endingBalance": transaction.get("balance"),
-                        "categoryHint": transaction.get("categoryHint")
-                    })
             return self._finalize_analysis_with_transactions(basic_metrics, extracted_data, {}, all_transactions, gpt_enhanced=False)
     
-    def _build_gpt_context(self, extracted_data: Dict[str, Any], basic_metrics: Dict[str, Any]) -> str:
-        """Build context for GPT analysis."""
+    async def _enhance_with_gpt_async(self, extracted_data: Dict[str, Any], basic_metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Async _enhance_with_gpt through the shared, concurrency-capped client."""
+        all_transactions = self._collect_transactions(extracted_data)
+        try:
+            context = self._build_gpt_context_with_transactions(extracted_data, basic_metrics, all_transactions)
+            async with _gpt_semaphore():
+                response = await _async_client().chat.completions.create(**self._gpt_request(context))
+            gpt_insights = self._parse_gpt_response(response)
+            return self._finalize_analysis_with_transactions(basic_metrics, extracted_data, gpt_insights, all_transactions, gpt_enhanced=True)
+            
+        except Exception as e:
+            print(f"GPT enhancement failed: {e}")
+            return self._finalize_analysis_with_transactions(basic_metrics, extracted_data, {}, all_transactions, gpt_enhanced=False)
+    
+    def _collect_transactions(self, extracted_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Flatten parsed transactions into the API's transaction format."""
+        all_transactions = []
+        for statement in extracted_data["statements"]:
+            for transaction in statement.get("transactions", []):
+                all_transactions.append({
+                    "date": transaction.get("date", "2024-01-01"),
+                    "description": transaction.get("description", ""),
+                    "amount": abs(float(transaction.get("amount", 0))),
+                    "type": "credit" if float(transaction.get("amount", 0)) > 0 else "debit",
+                    "endingBalance": transaction.get("balance"),
+                    "categoryHint": transaction.get("categoryHint")
+                })
+        return all_transactions
+    
+    def _gpt_request(self, context: str, response_format: Dict[str, Any] = _INSIGHTS_FORMAT) -> Dict[str, Any]:
+        """Chat completion arguments shared by the sync, async and batch paths."""
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": _GPT_SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": context
+                }
+            ],
+            "response_format": response_format
+        }
+    
+    def _parse_gpt_response(self, response: Any) -> Dict[str, Any]:
+        gpt_content = response.choices[0].message.content
+        return json.loads(gpt_content) if gpt_content else {}
+    
+    def _statements_summary(self, extracted_data: Dict[str, Any], include_samples: bool = False) -> List[Dict[str, Any]]:
+        """Per-statement digest for the GPT context. Raw sample transactions cost far
+        more tokens than they add signal, so they're only sent with ``include_samples``."""
         statements_summary = []
         for stmt in extracted_data["statements"]:
-            sample_transactions = stmt.get("transactions", [])[:10]  # First 10 transactions
-            statements_summary.append({
+            _, deposits, withdrawals = _split_amounts(stmt.get("amounts", np.empty(0)))
+            summary = {
                 "month": stmt["month"],
                 "transaction_count": len(stmt.get("transactions", [])),
-                "nsf_fees": stmt.get("nsf_fees", 0),
+                "nsf_fees": round(stmt.get("nsf_fees", 0), 2),
                 "days_negative": stmt.get("days_negative", 0),
-                "sample_transactions": [{
+                "monthly_deposits": round(deposits, 2),
+                "monthly_withdrawals": round(withdrawals, 2)
+            }
+            if include_samples:
+                summary["sample_transactions"] = [{
                     "description": t["description"],
                     "amount": t["amount"],
                     "balance": t["balance"]
-                } for t in sample_transactions]
-            })
-        
-        return f"""
-        Analyze this bank statement data and provide business insights:
-        
-        CALCULATED METRICS:
-        {json.dumps(basic_metrics, indent=2)}
-        
-        STATEMENT DETAILS:
-        {json.dumps(statements_summary, indent=2)}
-        
-        Please provide analysis in this JSON format:
-        {{
-            "business_type_indicators": [<array of business type clues>],
-            "cash_flow_patterns": {
-                "seasonality": "<seasonal patterns description>",
-                "trend": "<improving/stable/declining>",
-                "consistency": "<regular/irregular>" 
-            },
-            "risk_assessment": {
-                "risk_level": "<low/medium/high>",
-                "risk_flags": [<specific risk indicators>],
-                "positive_indicators": [<strengths found>]
-            },
-            "lending_recommendation": {
-                "confidence_score": <0-1 float>,
-                "recommended_amount": <suggested loan amount>,
-                "risk_comments": "<brief risk summary>"
-            },
-            "cash_flow_analysis": {
-                "operating_cash_flow": <estimated monthly OCF>,
-                "working_capital_trend": "<improving/stable/declining>",
-                "liquidity_assessment": "<strong/adequate/weak>"
-            }
-        }}
-        """
+                } for t in stmt.get("transactions", [])[:10]]  # First 10 transactions
+            statements_summary.append(summary)
+        return statements_summary
+    
+    def _build_gpt_context(self, extracted_data: Dict[str, Any], basic_metrics: Dict[str, Any]) -> str:
+        """Build context for GPT analysis: the static schema prompt first (a stable,
+        cacheable prefix), then the per-request data."""
+        return _STATIC_SCHEMA_PROMPT + f"""
+CALCULATED METRICS:
+{_dumps_indented(basic_metrics)}
+
+STATEMENT DETAILS:
+{_dumps_indented(self._statements_summary(extracted_data))}
+"""
         
     def _build_gpt_context_with_transactions(self, extracted_data: Dict[str, Any], basic_metrics: Dict[str, Any], transactions: list) -> str:
         """Build enhanced context for GPT analysis including transaction details."""
-        statements_summary = []
-        for stmt in extracted_data["statements"]:
-            sample_transactions = stmt.get("transactions", [])[:10]  # First 10 transactions
-            statements_summary.append({
-                "month": stmt["month"],
-                "transaction_count": len(stmt.get("transactions", [])),
-                "nsf_fees": stmt.get("nsf_fees", 0),
-                "days_negative": stmt.get("days_negative", 0),
-                "sample_transactions": [{
-                    "description": t["description"],
-                    "amount": t["amount"],
-                    "balance": t["balance"]
-                } for t in sample_transactions]
-            })
-        
-        return f"""
-        Analyze this bank statement data and provide business insights. Focus on transaction patterns and business cash flow.
-        
-        CALCULATED METRICS:
-        {json.dumps(basic_metrics, indent=2)}
-        
-        STATEMENT DETAILS:
-        {json.dumps(statements_summary, indent=2)}
-        
-        TRANSACTION COUNT: {len(transactions)} transactions parsed
-        
-        Please provide analysis in this JSON format:
-        {{
-            "business_type_indicators": [<array of business type clues>],
-            "cash_flow_patterns": {
-                "seasonality": "<seasonal patterns description>",
-                "trend": "<improving/stable/declining>",
-                "consistency": "<regular/irregular>" 
-            },
-            "risk_assessment": {
-                "risk_level": "<low/medium/high>",
-                "risk_flags": [<specific risk indicators>],
-                "positive_indicators": [<strengths found>]
-            },
-            "lending_recommendation": {
-                "confidence_score": <0-1 float>,
-                "recommended_amount": <suggested loan amount>,
-                "risk_comments": "<brief risk summary>"
-            },
-            "cash_flow_analysis": {
-                "operating_cash_flow": <estimated monthly OCF>,
-                "working_capital_trend": "<improving/stable/declining>",
-                "liquidity_assessment": "<strong/adequate/weak>"
-            }
-        }}
-        """
+        return self._build_gpt_context(extracted_data, basic_metrics) + f"""
+TRANSACTION COUNT: {len(transactions)} transactions parsed
+"""
     
     def _finalize_analysis_with_transactions(self, basic_metrics: Dict[str, Any], extracted_data: Dict[str, Any], 
                           gpt_insights: Dict[str, Any] = None, transactions: List[Dict[str, Any]] = None, gpt_enhanced: bool = False) -> Dict[str, Any]:
@@ -569,26 +948,24 @@ class BankStatementAnalyzer:
     
     def _get_mock_analysis(self, months: int) -> Dict[str, Any]:
         """Fallback mock analysis when all parsing fails."""
-        import random
-        
-        # Generate realistic sample data
-        avg_revenue = random.randint(60000, 120000)
-        volatility = random.uniform(0.2, 0.6)
-        nsf_count = random.randint(0, 3)
-        negative_days = random.randint(0, 8)
+        # Generate realistic sample data, one draw per distribution
+        avg_revenue, nsf_count, negative_days, avg_balance, highest, lowest = (
+            _RNG.integers(_MOCK_INT_LOW, _MOCK_INT_HIGH).tolist()
+        )
+        volatility, deposit_frequency = _RNG.uniform(_MOCK_UNIFORM_LOW, _MOCK_UNIFORM_HIGH).tolist()
         
         return {
             "avg_monthly_revenue": avg_revenue,
-            "avg_daily_balance": random.randint(15000, 35000),
+            "avg_daily_balance": avg_balance,
             "total_deposits": avg_revenue * months,
             "total_withdrawals": int(avg_revenue * months * 0.85),
             "total_nsf_fees": nsf_count * 35,  # $35 per NSF fee typically
             "total_nsf_count": nsf_count,
             "days_negative_balance": negative_days,
-            "highest_balance": random.randint(50000, 100000),
-            "lowest_balance": random.randint(2000, 15000),
+            "highest_balance": highest,
+            "lowest_balance": lowest,
             "cash_flow_volatility": round(volatility, 3),
-            "deposit_frequency": round(random.uniform(10.0, 18.0), 1),
+            "deposit_frequency": round(deposit_frequency, 1),
             "months_analyzed": months,
             "statements_processed": months,
             "analysis_confidence": 0.75,  # Lower confidence for fallback
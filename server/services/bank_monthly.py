@@ -1,73 +1,169 @@
-from typing import List, Dict, Any
-import re
-from decimal import Decimal
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Callable, Hashable, Iterable, Tuple
+from collections import OrderedDict
+import threading
+import numpy as np
+from .bank_patterns import (
+    PAT_PFSINGLE, PAT_ZELLE, PAT_AMEX, PAT_CHASE, PAT_CADENCE, PAT_SBA, PAT_NAV,
+    PAT_RADOV, PAT_MCHECK, PAT_WIRE_IN,
+)
+
+if TYPE_CHECKING:
+    import re
+
+_MONEY_STRIP = str.maketrans('', '', ',$ ')
 
 def _money(v) -> float:
-    try:
+    # Numbers pass straight through; strings like "$1,234.56-" are stripped and
+    # parsed with float() (trailing minus = debit). Anything else is 0.0
+    if isinstance(v, (int, float)):
         return float(v)
-    except Exception:
-        try: return float(Decimal(str(v)))
-        except Exception: return 0.0
-
-def _sum(items): return float(sum(_money(x) for x in items))
-
-PAT_PFSINGLE = re.compile(r'PFSINGLE|SETTLMT\s*PFSINGLE\s*PT|Electronic\s*Settlement', re.I)
-PAT_ZELLE    = re.compile(r'\bZELLE\b', re.I)
-PAT_AMEX     = re.compile(r'\bAMEX\b', re.I)
-PAT_CHASE    = re.compile(r'\bCHASE\b', re.I)
-PAT_CADENCE  = re.compile(r'\bCADENCE\b', re.I)
-PAT_SBA      = re.compile(r'\bSBA\b|\bEIDL\b', re.I)
-PAT_NAV      = re.compile(r'\bNAV\b', re.I)
-PAT_RADOV    = re.compile(r'RADOVANOVIC', re.I)
-PAT_MCHECK   = re.compile(r'mobile\s*check', re.I)
-PAT_WIRE_IN  = re.compile(r'\bWIRE\b', re.I)
-
-def build_monthly_rows(analyzed_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    out = []
-    statements = (analyzed_payload or {}).get("statements", [])
-    for st in statements:
-        txs = st.get("transactions", [])
-        beginning = _money(st.get("beginning_balance"))
-        ending    = _money(st.get("ending_balance"))
-        daily = [ _money(x) for x in st.get("daily_endings", []) ]
-        min_end = min(daily) if daily else None
-        max_end = max(daily) if daily else None
-        extras: Dict[str,Any] = st.get("extras", {}) or {}
-
-        deposits    = [ _money(t.get("amount")) for t in txs if _money(t.get("amount")) > 0 ]
-        withdrawals = [ abs(_money(t.get("amount"))) for t in txs if _money(t.get("amount")) < 0 ]
-
-        def wsum(pat): 
-            return _sum([ abs(_money(t.get("amount"))) for t in txs if _money(t.get("amount")) < 0 and pat.search(t.get("desc","")) ])
-        def dsum(pat): 
-            return _sum([ _money(t.get("amount")) for t in txs if _money(t.get("amount")) > 0 and pat.search(t.get("desc","")) ])
-
-        # Trust extractor values when available (from OpenAI Vision), fallback to computed
-        row = {
-            "file": st.get("source_file") or st.get("month") or "",
-            "period": st.get("period") or extras.get("period") or None,
-            "beginning_balance": extras.get("beginning_balance", beginning),
-            "ending_balance": extras.get("ending_balance", ending),
-            "net_change": (extras.get("ending_balance", ending) - extras.get("beginning_balance", beginning)),
-
-            "total_deposits": extras.get("total_deposits", _sum(deposits)),
-            "deposit_count": extras.get("deposit_count", len(deposits)),
-            "deposits_from_RADOVANOVIC": extras.get("deposits_from_RADOVANOVIC", dsum(PAT_RADOV)),
-            "mobile_check_deposits": extras.get("mobile_check_deposits", dsum(PAT_MCHECK)),
-            "wire_credits": extras.get("wire_credits", dsum(PAT_WIRE_IN)),
-
-            "total_withdrawals": extras.get("total_withdrawals", -_sum(withdrawals)),  # keep negative (CSV style)
-            "withdrawal_count": extras.get("withdrawal_count", len(withdrawals)),
-            "withdrawals_PFSINGLE_PT": extras.get("withdrawals_PFSINGLE_PT", wsum(PAT_PFSINGLE)),
-            "withdrawals_Zelle": extras.get("withdrawals_Zelle", wsum(PAT_ZELLE)),
-            "withdrawals_AMEX": extras.get("withdrawals_AMEX", wsum(PAT_AMEX)),
-            "withdrawals_CHASE_CC": extras.get("withdrawals_CHASE_CC", wsum(PAT_CHASE)),
-            "withdrawals_CADENCE_BANK": extras.get("withdrawals_CADENCE_BANK", wsum(PAT_CADENCE)),
-            "withdrawals_SBA_EIDL": extras.get("withdrawals_SBA_EIDL", wsum(PAT_SBA)),
-            "withdrawals_Nav_Technologies": extras.get("withdrawals_Nav_Technologies", wsum(PAT_NAV)),
-
-            "min_daily_ending_balance": extras.get("min_daily_ending_balance", min_end),
-            "max_daily_ending_balance": extras.get("max_daily_ending_balance", max_end),
-        }
-        out.append(row)
-    return out
+    s = str(v).translate(_MONEY_STRIP)
+    neg = s.endswith('-')
+    if neg:
+        s = s[:-1]
+    try:
+        f = float(s)
+    except ValueError:
+        return 0.0
+    return -f if neg else f
+
+# Row field -> category pattern
+WITHDRAWAL_CATEGORIES = {
+    "withdrawals_PFSINGLE_PT": PAT_PFSINGLE,
+    "withdrawals_Zelle": PAT_ZELLE,
+    "withdrawals_AMEX": PAT_AMEX,
+    "withdrawals_CHASE_CC": PAT_CHASE,
+    "withdrawals_CADENCE_BANK": PAT_CADENCE,
+    "withdrawals_SBA_EIDL": PAT_SBA,
+    "withdrawals_Nav_Technologies": PAT_NAV,
+}
+DEPOSIT_CATEGORIES = {
+    "deposits_from_RADOVANOVIC": PAT_RADOV,
+    "mobile_check_deposits": PAT_MCHECK,
+    "wire_credits": PAT_WIRE_IN,
+}
+
+def _codegen_totals(categories: Dict[str, "re.Pattern"]) -> Callable[[Iterable[Tuple[str, float]]], Dict[str, float]]:
+    # Emit one function with a local accumulator and an inline .search per
+    # category, so the hot loop has no inner loop over the patterns
+    if not categories:
+        return lambda _items: {}
+    n = len(categories)
+    src = [
+        "def totals(items):",
+        "    " + " = ".join(f"a{i}" for i in range(n)) + " = 0.0",
+        "    for d, a in items:",
+    ]
+    src += [f"        if s{i}(d): a{i} += a" for i in range(n)]
+    src.append("    return {" + ", ".join(f"{name!r}: a{i}" for i, name in enumerate(categories)) + "}")
+    ns = {f"s{i}": pat.search for i, pat in enumerate(categories.values())}
+    exec(compile("\n".join(src), f"<categorize {next(iter(categories))}>", "exec"), ns)
+    return ns["totals"]
+
+TOTALS_W = _codegen_totals(WITHDRAWAL_CATEGORIES)
+TOTALS_D = _codegen_totals(DEPOSIT_CATEGORIES)
+
+def _category_totals(descs: List[str], amounts: np.ndarray, idx: np.ndarray, totals) -> Dict[str, float]:
+    # Sum per distinct description first (statements repeat the same few payees
+    # hundreds of times), then classify each distinct description once. A
+    # description that mentions several categories still counts toward each
+    per_desc: Dict[str, float] = {}
+    for i, a in zip(idx.tolist(), amounts[idx].tolist()):
+        d = descs[i]
+        per_desc[d] = per_desc.get(d, 0.0) + a
+    return totals(per_desc.items())
+
+ROW_FIELDS = (
+    "file",
+    "period",
+    "beginning_balance",
+    "ending_balance",
+    "net_change",
+    "total_deposits",
+    "deposit_count",
+    "deposits_from_RADOVANOVIC",
+    "mobile_check_deposits",
+    "wire_credits",
+    "total_withdrawals",
+    "withdrawal_count",
+    "withdrawals_PFSINGLE_PT",
+    "withdrawals_Zelle",
+    "withdrawals_AMEX",
+    "withdrawals_CHASE_CC",
+    "withdrawals_CADENCE_BANK",
+    "withdrawals_SBA_EIDL",
+    "withdrawals_Nav_Technologies",
+    "min_daily_ending_balance",
+    "max_daily_ending_balance",
+)
+_ROW_TEMPLATE = dict.fromkeys(ROW_FIELDS)
+
+def _monthly_row(st: Dict[str, Any]) -> Dict[str, Any]:
+    txs = st.get("transactions", [])
+    beginning = _money(st.get("beginning_balance"))
+    ending    = _money(st.get("ending_balance"))
+    daily = [ _money(x) for x in st.get("daily_endings", []) ]
+    min_end = min(daily) if daily else None
+    max_end = max(daily) if daily else None
+    extras: Dict[str,Any] = st.get("extras", {}) or {}
+
+    # Parse each amount once into an array; sign masks drive the totals, counts
+    # and the category sums
+    amounts = np.fromiter((_money(t.get("amount")) for t in txs), dtype=np.float64, count=len(txs))
+    descs = [ t.get("desc","") for t in txs ]
+    pos = np.flatnonzero(amounts > 0)
+    neg = np.flatnonzero(amounts < 0)
+    d_totals = _category_totals(descs, amounts, pos, TOTALS_D)
+    w_totals = _category_totals(descs, -amounts, neg, TOTALS_W)
+
+    # Trust extractor values when available (from OpenAI Vision), fallback to computed.
+    # Filling a copy of the pre-sized template avoids regrowing the dict per row
+    row = _ROW_TEMPLATE.copy()
+    row["file"] = st.get("source_file") or st.get("month") or ""
+    row["period"] = st.get("period") or extras.get("period") or None
+    row["beginning_balance"] = extras.get("beginning_balance", beginning)
+    row["ending_balance"] = extras.get("ending_balance", ending)
+    row["net_change"] = (extras.get("ending_balance", ending) - extras.get("beginning_balance", beginning))
+
+    row["total_deposits"] = extras.get("total_deposits", float(amounts[pos].sum()))
+    row["deposit_count"] = extras.get("deposit_count", int(pos.size))
+    for name in DEPOSIT_CATEGORIES:
+        row[name] = extras.get(name, d_totals[name])
+
+    row["total_withdrawals"] = extras.get("total_withdrawals", float(amounts[neg].sum()))  # keep negative (CSV style)
+    row["withdrawal_count"] = extras.get("withdrawal_count", int(neg.size))
+    for name in WITHDRAWAL_CATEGORIES:
+        row[name] = extras.get(name, w_totals[name])
+
+    row["min_daily_ending_balance"] = extras.get("min_daily_ending_balance", min_end)
+    row["max_daily_ending_balance"] = extras.get("max_daily_ending_balance", max_end)
+    return row
+
+# Rows by snapshot: the monthly views rebuild rows from the same stored
+# snapshot on every request, so repeat renders skip the parsing. Snapshots are
+# never rewritten, so their id is a cheap key for the content. Requests run on
+# worker threads, hence the lock around the LRU bookkeeping
+_ROW_CACHE: "OrderedDict[Hashable, Tuple[Dict[str, Any], ...]]" = OrderedDict()
+_ROW_CACHE_LOCK = threading.Lock()
+ROW_CACHE_SIZE = 128
+
+def build_monthly_rows(analyzed_payload: Dict[str, Any], cache_key: Optional[Hashable] = None) -> List[Dict[str, Any]]:
+    """One row per statement. Pass cache_key (e.g. the snapshot id) only when
+    that key always names the same payload; its rows are then reused."""
+    rows = None
+    if cache_key is not None:
+        with _ROW_CACHE_LOCK:
+            rows = _ROW_CACHE.get(cache_key)
+            if rows is not None:
+                _ROW_CACHE.move_to_end(cache_key)
+    if rows is None:
+        statements = (analyzed_payload or {}).get("statements", [])
+        rows = tuple(_monthly_row(st) for st in statements)
+        if cache_key is not None:
+            with _ROW_CACHE_LOCK:
+                _ROW_CACHE[cache_key] = rows
+                _ROW_CACHE.move_to_end(cache_key)
+                while len(_ROW_CACHE) > ROW_CACHE_SIZE:
+                    _ROW_CACHE.popitem(last=False)
+    # Copies, so a caller editing its rows can't change what the cache holds
+    return [dict(row) for row in rows]
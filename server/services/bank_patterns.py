@@ -0,0 +1,74 @@
+"""Regex constants shared by the statement parsers.
+
+Compiled once at import: ``PAT_*`` classify single transaction descriptions
+(bank_monthly), ``RX_*`` anchor breakout amounts in full statement text
+(parsers.extract_any).
+"""
+import re
+
+PAT_PFSINGLE = re.compile(r'PFSINGLE|SETTLMT\s*PFSINGLE\s*PT|Electronic\s*Settlement', re.I)
+PAT_ZELLE    = re.compile(r'\bZELLE\b', re.I)
+PAT_AMEX     = re.compile(r'\bAMEX\b', re.I)
+PAT_CHASE    = re.compile(r'\bCHASE\b', re.I)
+PAT_CADENCE  = re.compile(r'\bCADENCE\b', re.I)
+PAT_SBA      = re.compile(r'\bSBA\b|\bEIDL\b', re.I)
+PAT_NAV      = re.compile(r'\bNAV\b', re.I)
+PAT_RADOV    = re.compile(r'RADOVANOVIC', re.I)
+PAT_MCHECK   = re.compile(r'mobile\s*check', re.I)
+PAT_WIRE_IN  = re.compile(r'\bWIRE\b', re.I)
+
+
+def _line_rx(rx: "re.Pattern") -> "re.Pattern":
+    # Whole lines containing rx, so one finditer over the text replaces a
+    # Python loop over splitlines()
+    return re.compile(r"^(?=[^\n]*?(?:" + rx.pattern + r"))[^\n]*", re.I|re.M)
+
+
+def breakout_master_rx(anchors, first_chars: str) -> "re.Pattern":
+    """One pattern for every (name, anchor) pair, so finditer walks the text
+    once. Each branch is a zero-width lookahead holding the named anchor, so
+    anchors of different fields can still overlap; the caller reads the
+    amount after each one. Branches are only tried where the next letter is in
+    first_chars, which is what lets the scan skip most positions."""
+    branches = "|".join(f"(?=(?P<{name}>{rx.pattern}))" for name, rx in anchors)
+    return re.compile(f"(?=[{first_chars}])(?:{branches})", re.I | re.S)
+
+
+_F = re.I | re.S
+RX_MCHECK   = re.compile(r"Mobile\s+Check\s+Deposit", _F)
+RX_RADOV    = re.compile(r"Electronic\s+Deposit(?:(?!\n).){0,200}?From\s+RADOVANOVIC", _F)
+RX_WIRE     = re.compile(r"Wire\s+Credit|Incoming\s+Wire|Credit\s+Wire", _F)
+RX_LOAN     = re.compile(r"Loan\s+Proceeds|Loan\s+Advance|Funding\s+Proceeds|Advance\s+Credit", _F)
+RX_PFSINGLE = re.compile(r"Electronic\s+Settlement(?:(?!\n).){0,200}?PFSINGLE|SETTLMT\s+PFSINGLE", _F)
+RX_ZELLE    = re.compile(r"\bZelle\b", _F)
+RX_AMEX     = re.compile(r"To\s+AMEX|AMEX\s+EPAYMENT|AMERICAN\s+EXPRESS", _F)
+RX_CHASE    = re.compile(r"To\s+CHASE\s+(?:CREDIT\s+CRD|CARD)|AUTOPAY\s+CHASE", _F)
+RX_CADENCE  = re.compile(r"To\s+CADENCE\s+BANK", _F)
+RX_SBA      = re.compile(r"SBA\s+EIDL|To\s+SBA", _F)
+RX_NAV      = re.compile(r"Nav\s+Technologies|Nav\s+Tech", _F)
+RX_FEES     = re.compile(r"Analysis\s+Service\s+Charge|Bank\s+Service\s+Fee|Monthly\s+Service\s+Fee", _F)
+RX_XFER_IN  = re.compile(r"Transfer\s+From|Online\s+Transfer\s+From|Account\s+Transfer\s+From", _F)
+RX_XFER_OUT = re.compile(r"Transfer\s+To|Online\s+Transfer\s+To|Account\s+Transfer\s+To", _F)
+RX_MCHECK_LINE = _line_rx(RX_MCHECK)
+# First letter of every alternative in the next-amount anchors above
+# (RX_RADOV .. RX_XFER_OUT); keep in step when adding one
+BREAKOUT_FIRST_CHARS = "abcefilmnostwz"
+
+# Every RX_* breakout anchor contains one of these words. The short ones are
+# only counted with the whitespace the anchor requires, so "PURCHASE" isn't
+# CHASE. Plain substring checks on the lower-cased page are far cheaper than
+# one case-insensitive alternation
+BREAKOUT_KEYWORDS = (
+    "mobile", "radovanovic", "wire", "loan", "proceeds", "advance", "pfsingle",
+    "zelle", "american", "service", "transfer",
+)
+BREAKOUT_SHORT_WORDS = ("chase", "amex", "sba", "cadence", "nav")
+RX_BREAKOUT_SHORT = re.compile(r"(?<=\s)(?:chase|amex|sba|cadence)|(?:amex|sba|nav)(?=\s)")
+
+
+def may_have_breakout(text: str) -> bool:
+    """False only when no RX_* breakout anchor can match in text."""
+    low = text.lower()
+    if any(k in low for k in BREAKOUT_KEYWORDS):
+        return True
+    return any(k in low for k in BREAKOUT_SHORT_WORDS) and RX_BREAKOUT_SHORT.search(low) is not None
@@ -1,24 +1,63 @@
-import os, re, json, base64
+import os, re, json, base64, hashlib, pathlib, time
 from typing import Dict, Any, List
-from decimal import Decimal
-import fitz  # PyMuPDF
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import fitz  # PyMuPDF
+except Exception:
+    fitz = None
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+import numpy as np
 import pdfplumber
+from services.bank_patterns import (
+    breakout_master_rx,
+    RX_MCHECK_LINE, RX_RADOV, RX_WIRE, RX_LOAN, RX_PFSINGLE, RX_ZELLE, RX_AMEX,
+    RX_CHASE, RX_CADENCE, RX_SBA, RX_NAV, RX_FEES, RX_XFER_IN, RX_XFER_OUT,
+    BREAKOUT_FIRST_CHARS, may_have_breakout,
+)
+from services.parsers.totals_any import extract_summary_from_pages
+
+_TO_F_STRIP = str.maketrans('', '', ',$ ')
 
 def _to_f(v) -> float:
-    try: return float(Decimal(str(v).replace(',','').replace('$','')))
-    except: return 0.0
+    if isinstance(v, (int, float)): return float(v)
+    s = (v if isinstance(v, str) else str(v)).translate(_TO_F_STRIP)
+    neg = s.endswith('-')
+    if neg: s = s[:-1]
+    try: f = float(s)
+    except ValueError: return 0.0
+    return -f if neg else f
+
+# Opt-in: upload page renders to the private bucket and hand the model a
+# short-lived presigned URL instead of inlining base64 in the request body
+VISION_IMAGE_URLS = os.getenv("EXTRACT_VISION_IMAGE_URLS", "0") == "1"
+
+def _page_image_url(pg, key: str = None) -> str:
+    # "low" detail is downscaled to 512px on the API side, so a 1.3x render
+    # (~800x1030 for a letter page) loses nothing; JPEG is a fraction of PNG
+    pix = pg.get_pixmap(matrix=fitz.Matrix(1.3,1.3), alpha=False)
+    jpeg = pix.tobytes("jpeg", jpg_quality=70)
+    if VISION_IMAGE_URLS and key:
+        from services.storage import s3_enabled, upload_private_bytes, presigned_get
+        if s3_enabled():  # the model can't fetch a local-disk path
+            upload_private_bytes(jpeg, key, "image/jpeg")
+            return presigned_get(key, expires_sec=600)
+    return "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii")
 
-def _encode_png_b64(pg) -> str:
-    pix = pg.get_pixmap(matrix=fitz.Matrix(2,2), alpha=False)
-    return base64.b64encode(pix.tobytes("png")).decode("ascii")
+# "other deposits" / "other withdrawals" are implied by the plain words, so
+# they needn't be scanned for separately; commonest first
+SUMMARY_KEYWORDS = ("deposits", "withdrawals", "totals", "account summary",
+                    "summary of your account", "summary of activity")
 
 def _pick_summary_pages(text_pages: List[str]) -> List[int]:
     idxs=[]
     for i,t in enumerate(text_pages):
         tt=t.lower()
-        if any(k in tt for k in ["account summary","summary of your account","summary of activity",
-                                 "deposits","withdrawals","other deposits","other withdrawals","totals"]):
+        if any(k in tt for k in SUMMARY_KEYWORDS):
             idxs.append(i)
+            if len(idxs)==3: break
     if not idxs:
         n=len(text_pages)
         idxs=[0]+([1] if n>1 else [])+([n-1] if n>2 else [])
@@ -30,98 +69,193 @@ def _pick_summary_pages(text_pages: List[str]) -> List[int]:
     return out
 
 CURRENCY_RE = re.compile(r"\$?\s?([0-9][\d,]*\.\d{2})-?")
-AMOUNT = lambda s: _to_f(CURRENCY_RE.search(s).group(1)) if CURRENCY_RE.search(s) else None
 
-def _sum_next_amount(text: str, anchor_pat: str, window: int = 200) -> float:
+def _amount(s: str, _search=CURRENCY_RE.search):
+    # Group 1 is digits, commas and a point only, so float() needs no more
+    # cleanup than dropping the commas
+    m = _search(s)
+    return float(m.group(1).replace(",", "")) if m else None
+
+def _sum_inline(text: str, line_rx: "re.Pattern") -> float:
     total=0.0
-    for m in re.finditer(anchor_pat, text, re.I|re.S):
-        tail=text[m.end(): m.end()+window]
-        a = AMOUNT(tail)
+    for m in line_rx.finditer(text):
+        a=_amount(m.group(0))
         if a is not None: total+=abs(a)
     return total
 
-def _sum_inline(text: str, line_pat: str) -> float:
-    total=0.0
-    for line in text.splitlines():
-        if re.search(line_pat, line, re.I):
-            a=AMOUNT(line)
-            if a is not None: total+=abs(a)
-    return total
+_NEXT_AMOUNT_ANCHORS = (
+    ("deposits_from_RADOVANOVIC", RX_RADOV),
+    ("wire_credits", RX_WIRE),
+    ("loan_proceeds_credits", RX_LOAN),
+    ("withdrawals_PFSINGLE_PT", RX_PFSINGLE),
+    ("withdrawals_Zelle", RX_ZELLE),
+    ("withdrawals_AMEX", RX_AMEX),
+    ("withdrawals_CHASE_CC", RX_CHASE),
+    ("withdrawals_CADENCE_BANK", RX_CADENCE),
+    ("withdrawals_SBA_EIDL", RX_SBA),
+    ("withdrawals_Nav_Technologies", RX_NAV),
+    ("bank_fees", RX_FEES),
+    ("transfer_in", RX_XFER_IN),
+    ("transfer_out", RX_XFER_OUT),
+)
+# Every next-amount breakout in a single pass; see breakout_master_rx
+BREAKOUT_MASTER_RE = breakout_master_rx(_NEXT_AMOUNT_ANCHORS, BREAKOUT_FIRST_CHARS)
+_BREAKOUT_FIELDS = tuple(name for name, _ in _NEXT_AMOUNT_ANCHORS)
+# The amount has to sit entirely inside this many chars after the anchor
+BREAKOUT_WINDOW = 200
 
 def _breakouts_fulltext(text: str) -> Dict[str,float]:
     out={}
-    out["mobile_check_deposits"]   = _sum_inline(text, r"Mobile\s+Check\s+Deposit")
-    out["deposits_from_RADOVANOVIC"] = _sum_next_amount(text, r"Electronic\s+Deposit(?:(?!\n).){0,200}?From\s+RADOVANOVIC")
-    out["wire_credits"]            = _sum_next_amount(text, r"Wire\s+Credit|Incoming\s+Wire|Credit\s+Wire")
-    out["loan_proceeds_credits"]   = _sum_next_amount(text, r"Loan\s+Proceeds|Loan\s+Advance|Funding\s+Proceeds|Advance\s+Credit")
-    out["withdrawals_PFSINGLE_PT"] = _sum_next_amount(text, r"Electronic\s+Settlement(?:(?!\n).){0,200}?PFSINGLE|SETTLMT\s+PFSINGLE")
-    out["withdrawals_Zelle"]       = _sum_next_amount(text, r"\bZelle\b")
-    out["withdrawals_AMEX"]        = _sum_next_amount(text, r"To\s+AMEX|AMEX\s+EPAYMENT|AMERICAN\s+EXPRESS")
-    out["withdrawals_CHASE_CC"]    = _sum_next_amount(text, r"To\s+CHASE\s+(?:CREDIT\s+CRD|CARD)|AUTOPAY\s+CHASE")
-    out["withdrawals_CADENCE_BANK"]= _sum_next_amount(text, r"To\s+CADENCE\s+BANK")
-    out["withdrawals_SBA_EIDL"]    = _sum_next_amount(text, r"SBA\s+EIDL|To\s+SBA")
-    out["withdrawals_Nav_Technologies"] = _sum_next_amount(text, r"Nav\s+Technologies|Nav\s+Tech")
-    out["bank_fees"]               = _sum_next_amount(text, r"Analysis\s+Service\s+Charge|Bank\s+Service\s+Fee|Monthly\s+Service\s+Fee")
-    out["transfer_in"]             = _sum_next_amount(text, r"Transfer\s+From|Online\s+Transfer\s+From|Account\s+Transfer\s+From")
-    out["transfer_out"]            = _sum_next_amount(text, r"Transfer\s+To|Online\s+Transfer\s+To|Account\s+Transfer\s+To")
+    # The line scan tests every line; a substring check on the lowered text
+    # is far cheaper and rules it out for most statements
+    out["mobile_check_deposits"] = _sum_inline(text, RX_MCHECK_LINE) if "mobile" in text.lower() else 0.0
+    out.update(dict.fromkeys(_BREAKOUT_FIELDS, 0.0))
+    # A field's own matches don't overlap (as with a per-field finditer): a hit
+    # starting inside that field's previous anchor is skipped
+    last_end = dict.fromkeys(_BREAKOUT_FIELDS, -1)
+    for m in BREAKOUT_MASTER_RE.finditer(text):
+        name = m.lastgroup
+        start, end = m.span(name)
+        if start < last_end[name]: continue
+        last_end[name] = end
+        a = _amount(text[end:end + BREAKOUT_WINDOW])
+        if a is not None:
+            out[name] += abs(a)
     return out
 
-def extract_daily_endings(text: str) -> List[float]:
-    heads = [
-        r"Date\s+Ending\s+Balance",
-        r"Daily\s+Ending\s+Balance",
-        r"Daily\s+Ledger\s+Balance",
-        r"Daily\s+Balance",
-    ]
-    for h in heads:
-        m = re.search(h + r".*?(?:Only\s+balances.*?|This\s+statement.*?|Page\s+\d+|\Z)", text, re.I|re.S)
+def _breakout_pages_text(text_pages: List[str]) -> str:
+    # Pages with no anchor keyword can't produce a breakout. Keep each matching
+    # page plus the one after it, so an amount just past a page break is still
+    # inside the anchor's window
+    hits = [ may_have_breakout(t) for t in text_pages ]
+    return "\n".join(t for i, t in enumerate(text_pages) if hits[i] or (i and hits[i-1]))
+
+_DAILY_HEADS = [ re.compile(h + r".*?(?:Only\s+balances.*?|This\s+statement.*?|Page\s+\d+|\Z)", re.I|re.S) for h in (
+    r"Date\s+Ending\s+Balance",
+    r"Daily\s+Ending\s+Balance",
+    r"Daily\s+Ledger\s+Balance",
+    r"Daily\s+Balance",
+) ]
+_BALANCE_RE = re.compile(r"[\d,]+\.\d{2}")
+
+def _daily_endings_array(text: str) -> np.ndarray:
+    for rx in _DAILY_HEADS:
+        m = rx.search(text)
         if m:
-            block = m.group(0)
-            vals = re.findall(r"([\d,]+\.\d{2})", block)
-            if vals: return [_to_f(x) for x in vals]
-    return []
+            vals = np.fromiter((float(x.replace(",","")) for x in _BALANCE_RE.findall(m.group(0))), dtype=np.float64)
+            if vals.size: return vals
+    return np.empty(0)
+
+def extract_daily_endings(text: str) -> List[float]:
+    return _daily_endings_array(text).tolist()
 
 def _openai_client():
-    try:
-        from openai import OpenAI
-        key = os.getenv("OPENAI_API_KEY")
-        return OpenAI(api_key=key) if key else None
-    except Exception:
-        return None
+    # The orchestrator's process-wide client, so this module shares its httpx
+    # pool, limits and timeouts. Imported here: the orchestrator imports us
+    from services.analysis_orchestrator import _OPENAI
+    return _OPENAI
 
 PROMPT = """You are reading bank statements. Extract exact MONTH TOTALS from each supplied page image.
 Return strict JSON:
 {"period_label": null|"Mon YYYY","beginning_balance":0.00|null,"ending_balance":0.00|null,"deposit_count":0|null,"total_deposits":0.00|null,"withdrawal_count":0|null,"total_withdrawals":0.00|null}
 Use the table totals (Deposits & Credits / Other Deposits, Withdrawals & Debits / Other Withdrawals). Return ONLY JSON."""
 
-def _llm_extract_on_pages(b64_pages: List[str]) -> Dict[str,Any]:
+BATCH_PROMPT = """Each group of page images below, introduced by "STATEMENT <n>", is a different statement.
+Return {"results": [...]} with one object per statement, each in the format above plus "statement": <n>."""
+
+def _image_part(url: str) -> Dict[str,Any]:
+    return {"type":"image_url","image_url":{"url":url,"detail":"low"}}
+
+# The totals JSON is ~150 tokens per statement. A hung call shouldn't stall a
+# batch; each extra statement in a call gets a little more time
+LLM_TOKENS_PER_STATEMENT = 200
+LLM_TIMEOUT = 15.0
+
+def _llm_json(content: List[Dict[str,Any]], statements: int = 1) -> Dict[str,Any]:
     client=_openai_client()
     if not client: return {}
-    content=[{"type":"text","text":PROMPT}]
-    for b in b64_pages:
-        content.append({"type":"input_image","image_url":{"url":f"data:image/png;base64,{b}","detail":"low"}})
     try:
         resp = client.chat.completions.create(
             model=os.getenv("OPENAI_MODEL","gpt-4o-mini"),
             messages=[{"role":"user","content":content}],
             response_format={"type":"json_object"},
             temperature=0.1,
-            max_tokens=400
+            max_tokens=LLM_TOKENS_PER_STATEMENT * statements,
+            timeout=LLM_TIMEOUT + 5.0 * (statements - 1)
         )
-        import json
         return json.loads(resp.choices[0].message.content)
     except Exception:
         return {}
 
-def extract_any_bank_statement(pdf_path: str) -> Dict[str,Any]:
-    text_pages=[]
+def _llm_extract_on_pages(image_urls: List[str]) -> Dict[str,Any]:
+    return _llm_json([{"type":"text","text":PROMPT}] + [ _image_part(u) for u in image_urls ])
+
+def _llm_extract_on_statements(groups: List[List[str]]) -> List[Dict[str,Any]]:
+    """One vision call for several statements' summary pages; results in input order.
+    Answers are matched on the echoed statement number, and any statement the
+    batch answer misses (or garbles) gets its own call."""
+    if len(groups) == 1: return [_llm_extract_on_pages(groups[0])]
+    content=[{"type":"text","text":PROMPT + "\n\n" + BATCH_PROMPT}]
+    for n, image_urls in enumerate(groups, 1):
+        content.append({"type":"text","text":f"STATEMENT {n}"})
+        content.extend(_image_part(u) for u in image_urls)
+    results = _llm_json(content, len(groups)).get("results")
+    by_n: Dict[int,Dict[str,Any]] = {}
+    for r in results if isinstance(results, list) else ():
+        if not isinstance(r, dict): continue
+        try:
+            n = int(r.pop("statement"))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 1 <= n <= len(groups) and n not in by_n: by_n[n] = r
+    return [ by_n.get(n) or _llm_extract_on_pages(image_urls) for n, image_urls in enumerate(groups, 1) ]
+
+def _fallback_pages(pdf_path: str) -> List[str]:
+    # Every page's text is needed (breakouts run over the whole statement), so
+    # without fitz the cheapest full pass wins: pdfium's C text layer, then
+    # pdfplumber, dropping each page's layout objects once its text is out
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            pages = []
+            for pg in pdf:
+                textpage = pg.get_textpage()
+                pages.append(textpage.get_text_range().replace("\r\n", "\n"))
+                textpage.close(); pg.close()
+            return pages
+        finally:
+            pdf.close()
+    pages = []
     with pdfplumber.open(pdf_path) as pdf:
         for pg in pdf.pages:
-            text_pages.append(pg.extract_text() or "")
-    doc=fitz.open(pdf_path)
-    idxs=_pick_summary_pages(text_pages)
-    b64s=[ _encode_png_b64(doc[i]) for i in idxs ]
-    llm=_llm_extract_on_pages(b64s)
+            pages.append(pg.extract_text() or "")
+            pg.flush_cache(); pg.close()
+    return pages
+
+def _read_statement(pdf_path: str, sha: str = None):
+    """(text pages, summary-page image URLs). PyMuPDF's C text layer serves both
+    the page picker and the breakouts; pdfium or pdfplumber (pure Python over
+    pdfminer) only stand in when fitz is missing, and then there are no images."""
+    if fitz is None:
+        return _fallback_pages(pdf_path), []
+    with fitz.open(pdf_path) as doc:
+        text_pages=[ pg.get_text("text") for pg in doc ]
+        idxs=_pick_summary_pages(text_pages)
+        return text_pages, [ _page_image_url(doc[i], sha and f"vision/{sha}/{i}.jpg") for i in idxs ]
+
+def _text_fields(text_pages: List[str]) -> Dict[str,Any]:
+    """Breakouts and the daily balance ladder; needs only the page text."""
+    full_text = "\n".join(text_pages)
+    brk = _breakouts_fulltext(_breakout_pages_text(text_pages))
+    daily = _daily_endings_array(full_text)
+    return { **brk,
+             "min_daily_ending_balance": float(daily.min()) if daily.size else None,
+             "max_daily_ending_balance": float(daily.max()) if daily.size else None,
+             "daily_endings_full": daily.tolist(),
+             # deterministic (no-AI) statement totals; the caller decides precedence
+             "summary_totals": extract_summary_from_pages(text_pages) }
+
+def _statement_row(text_fields: Dict[str,Any], llm: Dict[str,Any]) -> Dict[str,Any]:
     totals = {
         "beginning_balance": _to_f(llm.get("beginning_balance")) if llm else None,
         "ending_balance": _to_f(llm.get("ending_balance")) if llm else None,
@@ -131,11 +265,112 @@ def extract_any_bank_statement(pdf_path: str) -> Dict[str,Any]:
         "total_withdrawals": -abs(_to_f(llm.get("total_withdrawals"))) if llm and llm.get("total_withdrawals") not in (None,"") else None,
         "period": llm.get("period_label") if llm else None,
     }
-    full_text = "\n".join(text_pages)
-    brk = _breakouts_fulltext(full_text)
-    daily = extract_daily_endings(full_text)
-    row = { **totals, **brk,
-            "min_daily_ending_balance": min(daily) if daily else None,
-            "max_daily_ending_balance": max(daily) if daily else None,
-            "daily_endings_full": daily }
+    return { **totals, **text_fields }
+
+# Vision calls are network waits: they run here while the calling thread does
+# the regex work, and batched groups go out concurrently
+LLM_WORKERS = int(os.getenv("EXTRACT_LLM_WORKERS", "4"))
+_LLM_POOL = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="extract-llm")
+
+# Finished rows by PDF content, on disk so re-uploads and re-scrubs of the
+# same statement skip the parse, the renders and the vision call. Anchored to
+# the server directory rather than the CWD, and bounded by age and file count
+EXTRACT_CACHE_DIR = pathlib.Path(os.getenv("EXTRACT_CACHE_DIR") or pathlib.Path(__file__).resolve().parents[2] / "data" / "cache" / "extract")
+EXTRACT_CACHE_TTL = int(os.getenv("EXTRACT_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+EXTRACT_CACHE_MAX_FILES = int(os.getenv("EXTRACT_CACHE_MAX_FILES", "2000"))
+# Bump when the row layout or the text extraction changes
+EXTRACT_CACHE_VERSION = "2"
+
+def _file_sha256(pdf_path: str) -> str:
+    with open(pdf_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+def _cache_path(sha: str) -> pathlib.Path:
+    # The same PDF read by another model, row version or text backend is a
+    # different entry
+    tag = f"{EXTRACT_CACHE_VERSION}|{os.getenv('OPENAI_MODEL','gpt-4o-mini')}|{fitz is not None}"
+    return EXTRACT_CACHE_DIR / f"{sha}.{hashlib.blake2b(tag.encode(), digest_size=6).hexdigest()}.json"
+
+def _cached_row(sha: str):
+    path = _cache_path(sha)
+    try:
+        if time.time() - path.stat().st_mtime > EXTRACT_CACHE_TTL:
+            path.unlink(missing_ok=True)
+            return None
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+def _prune_cache() -> None:
+    # Drop expired entries, then the oldest ones past the file cap
+    now = time.time()
+    entries = []
+    for path in EXTRACT_CACHE_DIR.glob("*.json"):
+        try:
+            mtime = path.stat().st_mtime
+            if now - mtime > EXTRACT_CACHE_TTL:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((mtime, path))
+        except OSError:
+            pass
+    entries.sort()
+    for _, path in entries[:max(0, len(entries) - EXTRACT_CACHE_MAX_FILES)]:
+        path.unlink(missing_ok=True)
+
+def _store_row(sha: str, row: Dict[str,Any], llm: Dict[str,Any]) -> None:
+    # Without vision totals (no fitz to render pages, no summary page found,
+    # or a failed call) the row is degraded; leave it uncached so the next
+    # extraction retries
+    if not llm: return
+    try:
+        EXTRACT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path = _cache_path(sha)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(row))
+        os.replace(tmp, path)
+        _prune_cache()
+    except OSError:
+        pass
+
+def extract_any_bank_statement(pdf_path: str) -> Dict[str,Any]:
+    """Vision totals, breakouts and daily endings for one statement PDF.
+    The row also carries ``summary_totals``: the deterministic (no-AI) totals
+    read from the statement text, which the caller may prefer over the vision
+    ones (parse_bank_pdfs_to_payload pops it and does)."""
+    sha = _file_sha256(pdf_path)
+    row = _cached_row(sha)
+    if row is not None: return row
+    text_pages, images = _read_statement(pdf_path, sha)
+    llm_future = _LLM_POOL.submit(_llm_extract_on_pages, images) if images else None
+    text_fields = _text_fields(text_pages)
+    llm = llm_future.result() if llm_future else {}
+    row = _statement_row(text_fields, llm)
+    _store_row(sha, row, llm)
     return row
+
+# Statements per vision call. Off (1) by default: a shared call saves latency
+# but leans on the model keeping the statements apart
+LLM_BATCH_SIZE = int(os.getenv("EXTRACT_LLM_BATCH_SIZE", "1"))
+
+def extract_any_bank_statements_batch(pdf_paths: List[str], batch_size: int = LLM_BATCH_SIZE) -> List[Dict[str,Any]]:
+    """extract_any_bank_statement for many PDFs, sharing each vision call across
+    up to ``batch_size`` statements so the per-request latency is paid once per
+    group. Rows (``summary_totals`` included) come back in ``pdf_paths`` order."""
+    shas = [ _file_sha256(p) for p in pdf_paths ]
+    rows = [ _cached_row(sha) for sha in shas ]
+    todo = [ i for i, row in enumerate(rows) if row is None ]
+    read = { i: _read_statement(pdf_paths[i], shas[i]) for i in todo }
+    pending = [ i for i in todo if read[i][1] ]
+    step = max(1, batch_size)
+    chunks = [ pending[start:start + step] for start in range(0, len(pending), step) ]
+    futures = [ _LLM_POOL.submit(_llm_extract_on_statements, [ read[i][1] for i in chunk ]) for chunk in chunks ]
+    text_fields = { i: _text_fields(read[i][0]) for i in todo }
+    llm: Dict[int,Dict[str,Any]] = { i: {} for i in todo }
+    for chunk, future in zip(chunks, futures):
+        for i, result in zip(chunk, future.result()):
+            llm[i] = result
+    for i in todo:
+        rows[i] = _statement_row(text_fields[i], llm[i])
+        _store_row(shas[i], rows[i], llm[i])
+    return rows
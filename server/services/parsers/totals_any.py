@@ -1,10 +1,12 @@
 import re
-from decimal import Decimal
 from typing import Dict, Any, List, Optional
 
+_F_STRIP = str.maketrans("", "", ",$")
+
 def _f(x) -> float:
-    try: return float(Decimal(str(x).replace(",", "").replace("$","").strip()))
-    except: return 0.0
+    if isinstance(x, (int, float)): return float(x)
+    try: return float(str(x).translate(_F_STRIP).strip() or 0)
+    except ValueError: return 0.0
 
 MONEY = r"\$?\s*([0-9][\d,]*\.\d{2})\s*-?"
 MONEY_RE = re.compile(MONEY)
@@ -44,6 +46,18 @@ SUMMARIES = {
         r"\bWithdrawals\s+(\d+)\b",
     ],
 }
+# Compiled once; re's own cache is shared with every other module's patterns
+_SUMMARIES_COMPILED: Dict[str, List["re.Pattern"]] = {
+    key: [ re.compile(pat, re.I|re.S) for pat in pats ] for key, pats in SUMMARIES.items()
+}
+_OUT_KEYS = {
+    "deposits": "total_deposits",
+    "withdrawals": "total_withdrawals",
+    "beginning": "beginning_balance",
+    "ending": "ending_balance",
+    "deposit_count": "deposit_count",
+    "withdrawal_count": "withdrawal_count",
+}
 
 def _first_amount(s: str) -> Optional[float]:
     m = MONEY_RE.search(s)
@@ -53,20 +67,13 @@ def extract_summary_from_pages(text_pages: List[str]) -> Dict[str, Any]:
     joined = "\n".join(text_pages)
     out: Dict[str, Any] = {}
     def grab(key: str):
-        for pat in SUMMARIES[key]:
-            m = re.search(pat, joined, re.I|re.S)
+        for rx in _SUMMARIES_COMPILED[key]:
+            m = rx.search(joined)
             if m:
                 amt = _first_amount(m.group(0))
                 if amt is not None:
                     if key == "withdrawals": amt = -abs(amt)
-                    out_key = {
-                        "deposits": "total_deposits",
-                        "withdrawals": "total_withdrawals",
-                        "beginning": "beginning_balance",
-                        "ending": "ending_balance",
-                        "deposit_count": "deposit_count",
-                        "withdrawal_count": "withdrawal_count",
-                    }[key]
+                    out_key = _OUT_KEYS[key]
                     if out_key not in out:
                         out[out_key] = int(amt) if "count" in out_key else amt
     for k in ("deposits","withdrawals","beginning","ending","deposit_count","withdrawal_count"):
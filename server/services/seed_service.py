@@ -35,16 +35,16 @@ class SeedService:
             zip="97205",
             status="existing"
         )
-        self.db.add(existing_merchant)
         
         # Add field states for existing merchant (missing owner info)
+        now = datetime.utcnow()
         field_states = [
             FieldState(
                 merchant_id="merchant_1",
                 field_id="business.legal_name",
                 value="Maple Deli & Catering LLC",
                 source="crm",
-                last_verified_at=datetime.utcnow() - timedelta(days=30),
+                last_verified_at=now - timedelta(days=30),
                 confidence=0.95
             ),
             FieldState(
@@ -52,7 +52,7 @@ class SeedService:
                 field_id="contact.phone",
                 value="555-0123",
                 source="crm",
-                last_verified_at=datetime.utcnow() - timedelta(days=60),
+                last_verified_at=now - timedelta(days=60),
                 confidence=0.9
             ),
             FieldState(
@@ -60,22 +60,18 @@ class SeedService:
                 field_id="contact.email", 
                 value="ava@mapledeli.com",
                 source="crm",
-                last_verified_at=datetime.utcnow() - timedelta(days=45),
+                last_verified_at=now - timedelta(days=45),
                 confidence=0.95
             ),
             # Missing: owner.dob, owner.ssn_last4 (will be asked by chatbot)
         ]
         
-        for fs in field_states:
-            self.db.add(fs)
-        
         # Create new merchant (blank slate)
         new_merchant = Merchant(
             id="merchant_2",
             legal_name="New Business Co",
             status="new"
         )
-        self.db.add(new_merchant)
         
         # Create welcome events
         events = [
@@ -91,8 +87,10 @@ class SeedService:
             )
         ]
         
-        for event in events:
-            self.db.add(event)
-        
+        # Bulk inserts skip per-object unit-of-work bookkeeping. They're emitted
+        # immediately, so merchants go first for the foreign keys
+        self.db.bulk_save_objects([existing_merchant, new_merchant])
+        self.db.bulk_save_objects(field_states)
+        self.db.bulk_save_objects(events)
         self.db.commit()
         print("✅ Seed data created successfully")
\ No newline at end of file
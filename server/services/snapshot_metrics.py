@@ -1,9 +1,18 @@
 from typing import List, Dict, Any
-from decimal import Decimal
+import numpy as np
+
+_F_STRIP = str.maketrans("", "", ",$")
 
 def _f(x) -> float:
-    try: return float(Decimal(str(x)))
-    except: return 0.0
+    if isinstance(x, (int, float)): return float(x)
+    try: return float(str(x).translate(_F_STRIP).strip() or 0)
+    except ValueError: return 0.0
+
+KNOWN_OUT = ["withdrawals_PFSINGLE_PT","withdrawals_CADENCE_BANK","withdrawals_SBA_EIDL",
+             "withdrawals_AMEX","withdrawals_CHASE_CC","withdrawals_Nav_Technologies",
+             "withdrawals_Zelle","bank_fees","transfer_out"]
+_MONTH_FIELDS = ["total_deposits","deposit_count","wire_credits","loan_proceeds_credits","transfer_in",
+                 "total_withdrawals","beginning_balance","ending_balance"] + KNOWN_OUT
 
 def compute_snapshot(months: List[Dict[str,Any]]) -> Dict[str,Any]:
     if not months:
@@ -11,30 +20,31 @@ def compute_snapshot(months: List[Dict[str,Any]]) -> Dict[str,Any]:
             "avg_deposit_amount","other_advances","transfer_amount","misc_deduction",
             "number_of_deposits","negative_days","avg_daily_balance","avg_beginning_balance","avg_ending_balance"
         ]}
-    dep_sum = sum(_f(m.get("total_deposits",0)) for m in months)
-    dep_cnt = int(sum(_f(m.get("deposit_count",0)) for m in months))
+    # One float64 column per month field, so each aggregate below is an
+    # array reduction rather than another Python pass over the months
+    col = { k: np.fromiter((_f(m.get(k,0)) for m in months), dtype=np.float64, count=len(months))
+            for k in _MONTH_FIELDS }
+    dep_sum = float(col["total_deposits"].sum())
+    dep_cnt = int(col["deposit_count"].sum())
     avg_deposit_amount = (dep_sum/dep_cnt) if dep_cnt else 0.0
 
-    other_advances = sum(_f(m.get("wire_credits",0)) + _f(m.get("loan_proceeds_credits",0)) for m in months)
-    transfer_amount = sum(_f(m.get("transfer_in",0)) + _f(m.get("transfer_out",0)) for m in months)
+    other_advances = float((col["wire_credits"] + col["loan_proceeds_credits"]).sum())
+    transfer_amount = float((col["transfer_in"] + col["transfer_out"]).sum())
 
-    known_out = ["withdrawals_PFSINGLE_PT","withdrawals_CADENCE_BANK","withdrawals_SBA_EIDL",
-                 "withdrawals_AMEX","withdrawals_CHASE_CC","withdrawals_Nav_Technologies",
-                 "withdrawals_Zelle","bank_fees","transfer_out"]
-    total_w = sum(abs(_f(m.get("total_withdrawals",0))) for m in months)
-    known_sum = sum(abs(_f(m.get(k,0))) for m in months for k in known_out)
+    total_w = float(np.abs(col["total_withdrawals"]).sum())
+    known_sum = float(sum(np.abs(col[k]).sum() for k in KNOWN_OUT))
     misc_deduction = max(0.0, total_w - known_sum)
 
     number_of_deposits = dep_cnt
-    all_daily = []
-    for m in months: all_daily.extend([_f(x) for x in (m.get("daily_endings_full") or []) if x is not None])
-    negative_days = sum(1 for x in all_daily if x < 0)
-    if not all_daily:
-        all_daily = [(_f(m.get("beginning_balance",0)) + _f(m.get("ending_balance",0)))/2.0 for m in months]
-    avg_daily_balance = (sum(all_daily)/len(all_daily)) if all_daily else 0.0
-
-    avg_beginning_balance = sum(_f(m.get("beginning_balance",0)) for m in months)/len(months)
-    avg_ending_balance = sum(_f(m.get("ending_balance",0)) for m in months)/len(months)
+    all_daily = np.fromiter((_f(x) for m in months for x in (m.get("daily_endings_full") or []) if x is not None),
+                            dtype=np.float64)
+    negative_days = int((all_daily < 0).sum())
+    if not all_daily.size:
+        all_daily = (col["beginning_balance"] + col["ending_balance"]) / 2.0
+    avg_daily_balance = float(all_daily.mean()) if all_daily.size else 0.0
+
+    avg_beginning_balance = float(col["beginning_balance"].mean())
+    avg_ending_balance = float(col["ending_balance"].mean())
 
     return {
         "avg_deposit_amount": round(avg_deposit_amount,2),
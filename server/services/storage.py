@@ -1,41 +1,46 @@
-import pathlib, hashlib
+import pathlib, hashlib, base64
+from functools import lru_cache
 import boto3
 from botocore.client import Config
 from core.config import get_settings
 
 S = get_settings()
 
-def _sha256(b: bytes) -> str:
-    h = hashlib.sha256(); h.update(b); return h.hexdigest()
+def s3_enabled() -> bool:
+    """False in mock mode or without S3 credentials; storage then goes to local disk."""
+    return not S.MOCK_MODE and bool(S.AWS_ACCESS_KEY_ID and S.AWS_SECRET_ACCESS_KEY and S.S3_BUCKET)
 
-def upload_private_bytes(data: bytes, key: str, content_type: str = "application/octet-stream"):
-    # local fallback in dev
-    if S.MOCK_MODE or not (S.AWS_ACCESS_KEY_ID and S.AWS_SECRET_ACCESS_KEY and S.S3_BUCKET):
-        base = pathlib.Path("./data/uploads"); base.mkdir(parents=True, exist_ok=True)
-        path = base / key.replace("/", "__")
-        path.write_bytes(data)
-        return {"bucket": "local", "key": str(path), "sha256": _sha256(data)}
-
-    s3 = boto3.client(
+@lru_cache(maxsize=1)
+def _s3_client():
+    # Client setup (credential chain, endpoint resolution) costs far more than
+    # a request; boto3 clients are thread-safe, so one serves every call
+    return boto3.client(
         "s3",
         region_name=S.AWS_REGION,
         aws_access_key_id=S.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=S.AWS_SECRET_ACCESS_KEY,
         config=Config(signature_version="s3v4"),
     )
-    s3.put_object(Bucket=S.S3_BUCKET, Key=key, Body=data, ContentType=content_type, ACL="private")
-    return {"bucket": S.S3_BUCKET, "key": key, "sha256": _sha256(data)}
+
+def upload_private_bytes(data: bytes, key: str, content_type: str = "application/octet-stream"):
+    # Hash once up front (hashlib runs on OpenSSL's SHA-NI code) and reuse the
+    # digest for the returned metadata and S3's checksum
+    sha = hashlib.sha256(data).hexdigest()
+    # local fallback in dev
+    if not s3_enabled():
+        base = pathlib.Path("./data/uploads"); base.mkdir(parents=True, exist_ok=True)
+        path = base / key.replace("/", "__")
+        path.write_bytes(data)
+        return {"bucket": "local", "key": str(path), "sha256": sha}
+
+    # Handing S3 our digest lets botocore skip computing its own body checksum
+    _s3_client().put_object(Bucket=S.S3_BUCKET, Key=key, Body=data, ContentType=content_type, ACL="private",
+                            ChecksumSHA256=base64.b64encode(bytes.fromhex(sha)).decode("ascii"))
+    return {"bucket": S.S3_BUCKET, "key": key, "sha256": sha}
 
 def presigned_get(key: str, expires_sec: int = 3600) -> str:
-    if S.MOCK_MODE or not (S.AWS_ACCESS_KEY_ID and S.AWS_SECRET_ACCESS_KEY and S.S3_BUCKET):
+    if not s3_enabled():
         # For local storage, return a placeholder URL
         return f"/local/{key}"
     
-    s3 = boto3.client(
-        "s3",
-        region_name=S.AWS_REGION,
-        aws_access_key_id=S.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=S.AWS_SECRET_ACCESS_KEY,
-        config=Config(signature_version="s3v4"),
-    )
-    return s3.generate_presigned_url("get_object", Params={"Bucket": S.S3_BUCKET, "Key": key}, ExpiresIn=expires_sec)
\ No newline at end of file
+    return _s3_client().generate_presigned_url("get_object", Params={"Bucket": S.S3_BUCKET, "Key": key}, ExpiresIn=expires_sec)
\ No newline at end of file
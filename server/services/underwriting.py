@@ -1,9 +1,15 @@
 """Underwriting guardrails and eligibility validation service."""
 
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
-from enum import Enum
+from functools import lru_cache
+from enum import Enum, IntFlag
 import json
+import numpy as np
+try:
+    from numba import njit
+except Exception:
+    njit = None
 
 
 class UnderwritingDecision(Enum):
@@ -21,7 +27,7 @@ class ViolationSeverity(Enum):
     CRITICAL = "critical"
 
 
-@dataclass
+@dataclass(slots=True)
 class RuleViolation:
     """Represents a violated underwriting rule."""
     rule_id: str
@@ -32,15 +38,108 @@ class RuleViolation:
     field_name: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class RuleSpec:
+    """One underwriting rule: the threshold it is checked against and how a
+    violation of it is reported."""
+    rule_id: str
+    threshold: float
+    severity: ViolationSeverity
+    field_name: str
+    description: str
+    below: bool = False  # violated below the threshold (a minimum); else above it
+    risk_weight: float = 0.0  # added to the risk score on a violation
+
+
+@dataclass(slots=True)
 class UnderwritingResult:
     """Result of underwriting analysis."""
     decision: UnderwritingDecision
     violations: List[RuleViolation]
     max_offer_amount: Optional[float]
     risk_score: float
-    reasons: List[str]
+    reasons: Tuple[str, ...]
     ca_compliant: bool
+    reason_flags: int = 0  # ReasonFlag bits behind ``reasons``
+    critical_count: int = 0  # violations by severity
+    warning_count: int = 0
+
+
+class ReasonFlag(IntFlag):
+    """Reasons given for an underwriting decision, as stored in
+    UnderwritingResult.reason_flags."""
+    CA_HIGH_NSF = 1
+    CRITICAL_VIOLATIONS = 2
+    MANUAL_REVIEW = 4
+    MODERATE_RISK = 8
+    CLEAN = 16
+
+
+# In the order the reasons are listed
+REASON_TEXT = {
+    ReasonFlag.CA_HIGH_NSF: "High NSF count triggers CA high-risk classification",
+    ReasonFlag.CRITICAL_VIOLATIONS: "Critical underwriting violations or compliance issues",
+    ReasonFlag.MANUAL_REVIEW: "Multiple warnings or high risk score requires manual review",
+    ReasonFlag.MODERATE_RISK: "Moderate risk - conditional approval with limits",
+    ReasonFlag.CLEAN: "Meets all underwriting requirements",
+}
+# reasons tuple for every combination of flags, indexed by the int value
+_REASONS_BY_FLAGS = tuple(
+    tuple(text for flag, text in REASON_TEXT.items() if flags & flag)
+    for flags in range(1 << len(ReasonFlag))
+)
+_DECISION_ORDER = (UnderwritingDecision.DECLINED, UnderwritingDecision.MANUAL_REVIEW,
+                   UnderwritingDecision.CONDITIONAL, UnderwritingDecision.APPROVED)
+_DECISION_FLAGS = (int(ReasonFlag.CRITICAL_VIOLATIONS), int(ReasonFlag.MANUAL_REVIEW),
+                   int(ReasonFlag.MODERATE_RISK), int(ReasonFlag.CLEAN))
+
+
+@dataclass
+class UnderwritingBatchResult:
+    """Columnar evaluate_metrics output for N deals: row i of each array is deal i.
+    ``violations`` is an N x len(BATCH_RULES) boolean matrix; per-deal
+    UnderwritingResult objects are only built on demand by ``result(i)``."""
+    violations: np.ndarray
+    actual_values: np.ndarray
+    thresholds: np.ndarray
+    severities: Tuple[ViolationSeverity, ...]
+    risk_score: np.ndarray
+    decision_code: np.ndarray  # index into _DECISION_ORDER
+    max_offer_amount: np.ndarray  # NaN where declined
+    ca_compliant: np.ndarray
+    ca_high_nsf: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.risk_score)
+
+    def decision(self, i: int) -> UnderwritingDecision:
+        return _DECISION_ORDER[self.decision_code[i]]
+
+    def result(self, i: int) -> "UnderwritingResult":
+        violations = [
+            RuleViolation(
+                rule_id=spec.rule_id,
+                description=spec.description,
+                severity=self.severities[j],
+                actual_value=float(self.actual_values[i, j]),
+                threshold_value=float(self.thresholds[j]),
+                field_name=spec.field_name,
+            )
+            for j, spec in enumerate(BATCH_RULES) if self.violations[i, j]
+        ]
+        flags = _DECISION_FLAGS[self.decision_code[i]] | (_CA_HIGH_NSF_FLAG if self.ca_high_nsf[i] else 0)
+        offer = self.max_offer_amount[i]
+        return UnderwritingResult(
+            decision=self.decision(i),
+            violations=violations,
+            max_offer_amount=None if np.isnan(offer) else float(offer),
+            risk_score=float(self.risk_score[i]),
+            reasons=_REASONS_BY_FLAGS[flags],
+            ca_compliant=bool(self.ca_compliant[i]),
+            reason_flags=flags,
+            critical_count=sum(v.severity is ViolationSeverity.CRITICAL for v in violations),
+            warning_count=sum(v.severity is ViolationSeverity.WARNING for v in violations),
+        )
 
 
 class CAComplianceRules:
@@ -56,35 +155,164 @@ class CAComplianceRules:
     HIGH_RISK_NSF_THRESHOLD = 8  # NSF count that triggers high-risk classification
 
 
+# Rule table, indexed by the IDX_* constants below. The first nine rules are
+# the ones evaluate_metrics checks, in the order it reports them.
+RULES: Tuple[RuleSpec, ...] = (
+    # Revenue requirements
+    RuleSpec("min_monthly_revenue", 15000, ViolationSeverity.CRITICAL,
+             "avg_monthly_revenue", "Monthly revenue below minimum threshold", below=True, risk_weight=0.3),
+    RuleSpec("min_annual_revenue", 180000, ViolationSeverity.CRITICAL,
+             "annual_revenue", "Annual revenue below minimum threshold", below=True),
+
+    # NSF limits
+    RuleSpec("max_nsf_3m", 5, ViolationSeverity.CRITICAL,
+             "total_nsf_3m", "NSF count exceeds maximum threshold", risk_weight=0.25),
+    RuleSpec("max_nsf_ratio", 0.03, ViolationSeverity.WARNING,
+             "nsf_ratio", "NSF ratio too high", risk_weight=0.15),
+
+    # Balance requirements
+    RuleSpec("min_avg_balance", 5000, ViolationSeverity.WARNING,
+             "avg_daily_balance_3m", "Average daily balance too low", below=True, risk_weight=0.2),
+    RuleSpec("balance_to_revenue_ratio", 0.05, ViolationSeverity.WARNING,
+             "balance_to_revenue_ratio", "Balance to revenue ratio too low", below=True, risk_weight=0.15),
+
+    # Negative balance limits
+    RuleSpec("max_negative_days_3m", 15, ViolationSeverity.CRITICAL,
+             "total_days_negative_3m", "Too many negative balance days", risk_weight=0.3),
+
+    # CA specific rules
+    RuleSpec("ca_min_revenue", CAComplianceRules.MIN_REVENUE_REQUIREMENT, ViolationSeverity.CRITICAL,
+             "annual_revenue", "Does not meet CA minimum revenue requirement", below=True),
+    RuleSpec("ca_max_nsf_ratio", CAComplianceRules.MAX_NSF_RATIO, ViolationSeverity.CRITICAL,
+             "nsf_ratio", "NSF ratio exceeds CA compliance limit"),
+
+    # Not checked by evaluate_metrics
+    RuleSpec("max_consecutive_negative_days", 7, ViolationSeverity.WARNING,
+             "consecutive_negative_days", "Too many consecutive negative balance days"),
+
+    # Risk concentration limits
+    RuleSpec("max_daily_payment_ratio", 0.15, ViolationSeverity.WARNING,  # 15% of daily revenue
+             "payment_ratio", "Daily payment ratio exceeds limit"),
+    RuleSpec("max_total_exposure", 2.0, ViolationSeverity.WARNING,  # 2x monthly revenue
+             "exposure_ratio", "Total exposure ratio exceeds limit"),
+)
+IDX_MIN_MONTHLY_REV = 0
+IDX_MIN_ANNUAL_REV = 1
+IDX_MAX_NSF_3M = 2
+IDX_MAX_NSF_RATIO = 3
+IDX_MIN_AVG_BALANCE = 4
+IDX_BALANCE_TO_REV = 5
+IDX_MAX_NEGATIVE_DAYS_3M = 6
+IDX_CA_MIN_REVENUE = 7
+IDX_CA_MAX_NSF_RATIO = 8
+IDX_MAX_CONSECUTIVE_NEG_DAYS = 9
+IDX_MAX_DAILY_PAYMENT_RATIO = 10
+IDX_MAX_TOTAL_EXPOSURE = 11
+
+# Columns of UnderwritingBatchResult.violations
+BATCH_RULES: Tuple[RuleSpec, ...] = RULES[:IDX_CA_MAX_NSF_RATIO + 1]
+
+
+# _score_kernel works on plain floats so numba can compile it; the thresholds
+# and risk weights are read from RULES once here and inlined as constants
+_T_MIN_MONTHLY_REV = float(RULES[IDX_MIN_MONTHLY_REV].threshold)
+_T_MIN_ANNUAL_REV = float(RULES[IDX_MIN_ANNUAL_REV].threshold)
+_T_MAX_NSF_3M = float(RULES[IDX_MAX_NSF_3M].threshold)
+_T_MAX_NSF_RATIO = float(RULES[IDX_MAX_NSF_RATIO].threshold)
+_T_MIN_AVG_BALANCE = float(RULES[IDX_MIN_AVG_BALANCE].threshold)
+_T_BALANCE_TO_REV = float(RULES[IDX_BALANCE_TO_REV].threshold)
+_T_MAX_NEGATIVE_DAYS_3M = float(RULES[IDX_MAX_NEGATIVE_DAYS_3M].threshold)
+_T_CA_MIN_REVENUE = float(RULES[IDX_CA_MIN_REVENUE].threshold)
+_T_CA_MAX_NSF_RATIO = float(RULES[IDX_CA_MAX_NSF_RATIO].threshold)
+_T_CA_HIGH_RISK_NSF = float(CAComplianceRules.HIGH_RISK_NSF_THRESHOLD)
+_W_MIN_MONTHLY_REV = RULES[IDX_MIN_MONTHLY_REV].risk_weight
+_W_MAX_NSF_3M = RULES[IDX_MAX_NSF_3M].risk_weight
+_W_MAX_NSF_RATIO = RULES[IDX_MAX_NSF_RATIO].risk_weight
+_W_MIN_AVG_BALANCE = RULES[IDX_MIN_AVG_BALANCE].risk_weight
+_W_BALANCE_TO_REV = RULES[IDX_BALANCE_TO_REV].risk_weight
+_W_MAX_NEGATIVE_DAYS_3M = RULES[IDX_MAX_NEGATIVE_DAYS_3M].risk_weight
+# Risk added by the CA high-NSF classification, which is not a rule
+_W_CA_HIGH_RISK_NSF = 0.2
+
+# Bit j of the kernel's mask is BATCH_RULES[j]; the bit above them flags the
+# CA high-NSF classification, which adds risk but is not a violation
+_CRITICAL_MASK = sum(1 << j for j, spec in enumerate(BATCH_RULES) if spec.severity == ViolationSeverity.CRITICAL)
+_WARNING_MASK = sum(1 << j for j, spec in enumerate(BATCH_RULES) if spec.severity == ViolationSeverity.WARNING)
+_CA_MASK = (1 << IDX_CA_MIN_REVENUE) | (1 << IDX_CA_MAX_NSF_RATIO)
+_CA_HIGH_NSF_BIT = 1 << len(BATCH_RULES)
+_CA_HIGH_NSF_FLAG = int(ReasonFlag.CA_HIGH_NSF)
+
+
+def _score_kernel(monthly_rev, daily_bal, nsf_count, negative_days, state_is_ca):
+    """Numeric core of evaluate_metrics: returns (risk_score, mask,
+    decision_code, max_offer_amount) with NaN for no offer. Compiled with
+    numba when it is installed."""
+    annual_rev = monthly_rev * 12
+
+    mask = 0
+    risk = 0.3
+    if monthly_rev < _T_MIN_MONTHLY_REV:
+        mask |= 1 << IDX_MIN_MONTHLY_REV
+        risk += _W_MIN_MONTHLY_REV
+    if annual_rev < _T_MIN_ANNUAL_REV:
+        mask |= 1 << IDX_MIN_ANNUAL_REV
+    if nsf_count > _T_MAX_NSF_3M:
+        mask |= 1 << IDX_MAX_NSF_3M
+        risk += _W_MAX_NSF_3M
+    nsf_ratio = nsf_count / 90 if nsf_count > 0 else 0.0
+    if state_is_ca:
+        if annual_rev < _T_CA_MIN_REVENUE:
+            mask |= 1 << IDX_CA_MIN_REVENUE
+        if nsf_ratio > _T_CA_MAX_NSF_RATIO:
+            mask |= 1 << IDX_CA_MAX_NSF_RATIO
+        if nsf_count >= _T_CA_HIGH_RISK_NSF:
+            mask |= _CA_HIGH_NSF_BIT
+    btr = daily_bal / monthly_rev if monthly_rev > 0 else 0.0
+    if nsf_ratio > _T_MAX_NSF_RATIO:
+        mask |= 1 << IDX_MAX_NSF_RATIO
+        risk += _W_MAX_NSF_RATIO
+    if daily_bal < _T_MIN_AVG_BALANCE:
+        mask |= 1 << IDX_MIN_AVG_BALANCE
+        risk += _W_MIN_AVG_BALANCE
+    if btr < _T_BALANCE_TO_REV:
+        mask |= 1 << IDX_BALANCE_TO_REV
+        risk += _W_BALANCE_TO_REV
+    if negative_days > _T_MAX_NEGATIVE_DAYS_3M:
+        mask |= 1 << IDX_MAX_NEGATIVE_DAYS_3M
+        risk += _W_MAX_NEGATIVE_DAYS_3M
+    # Added last, as in evaluate_metrics_batch, so the float sums match
+    if mask & _CA_HIGH_NSF_BIT:
+        risk += _W_CA_HIGH_RISK_NSF
+
+    warnings = 0
+    w = mask & _WARNING_MASK
+    while w:
+        w &= w - 1
+        warnings += 1
+    if mask & (_CRITICAL_MASK | _CA_MASK):
+        decision, offer = 0, np.nan
+    elif warnings >= 3 or risk > 0.8:
+        decision, offer = 1, monthly_rev * 0.5  # Conservative cap
+    elif risk > 0.6:
+        decision, offer = 2, monthly_rev * 0.8
+    else:
+        decision, offer = 3, monthly_rev * 1.2
+    return min(risk, 1.0), mask, decision, offer
+
+
+if njit is not None:
+    # No fastmath: the float sums and compares must match evaluate_metrics_batch
+    _score_kernel = njit(cache=True)(_score_kernel)
+    # Compile at import, not on the first request. evaluate_metrics casts its
+    # inputs to float, so this is the only signature ever used
+    _score_kernel(0.0, 0.0, 0.0, 0.0, True)
+
+
 class UnderwritingGuardrails:
     """Core underwriting rules and business logic."""
     
     def __init__(self):
-        self.rules = {
-            # Revenue requirements
-            "min_monthly_revenue": {"threshold": 15000, "severity": ViolationSeverity.CRITICAL},
-            "min_annual_revenue": {"threshold": 180000, "severity": ViolationSeverity.CRITICAL},
-            
-            # NSF limits
-            "max_nsf_3m": {"threshold": 5, "severity": ViolationSeverity.CRITICAL},
-            "max_nsf_ratio": {"threshold": 0.03, "severity": ViolationSeverity.WARNING},
-            
-            # Balance requirements
-            "min_avg_balance": {"threshold": 5000, "severity": ViolationSeverity.WARNING},
-            "balance_to_revenue_ratio": {"threshold": 0.05, "severity": ViolationSeverity.WARNING},
-            
-            # Negative balance limits
-            "max_negative_days_3m": {"threshold": 15, "severity": ViolationSeverity.CRITICAL},
-            "max_consecutive_negative_days": {"threshold": 7, "severity": ViolationSeverity.WARNING},
-            
-            # CA specific rules
-            "ca_min_revenue": {"threshold": CAComplianceRules.MIN_REVENUE_REQUIREMENT, "severity": ViolationSeverity.CRITICAL},
-            "ca_max_nsf_ratio": {"threshold": CAComplianceRules.MAX_NSF_RATIO, "severity": ViolationSeverity.CRITICAL},
-            
-            # Risk concentration limits
-            "max_daily_payment_ratio": {"threshold": 0.15, "severity": ViolationSeverity.WARNING},  # 15% of daily revenue
-            "max_total_exposure": {"threshold": 2.0, "severity": ViolationSeverity.WARNING},  # 2x monthly revenue
-        }
+        self.rules = RULES
     
     def evaluate_metrics(
         self, 
@@ -94,163 +322,110 @@ class UnderwritingGuardrails:
     ) -> UnderwritingResult:
         """Evaluate financial metrics against underwriting rules."""
         
-        violations = []
-        reasons = []
-        risk_score = 0.3  # Base risk score
-        
-        # Extract metrics
         monthly_revenue = metrics.get("avg_monthly_revenue", 0)
-        annual_revenue = monthly_revenue * 12
         daily_balance = metrics.get("avg_daily_balance_3m", 0)
         nsf_count = metrics.get("total_nsf_3m", 0)
         negative_days = metrics.get("total_days_negative_3m", 0)
-        
-        # Calculate derived metrics
-        nsf_ratio = nsf_count / 90 if nsf_count > 0 else 0  # NSF per day ratio
-        balance_to_revenue_ratio = daily_balance / monthly_revenue if monthly_revenue > 0 else 0
-        
-        # Check revenue requirements
-        if monthly_revenue < self.rules["min_monthly_revenue"]["threshold"]:
-            violations.append(RuleViolation(
-                rule_id="min_monthly_revenue",
-                description="Monthly revenue below minimum threshold",
-                severity=self.rules["min_monthly_revenue"]["severity"],
-                actual_value=monthly_revenue,
-                threshold_value=self.rules["min_monthly_revenue"]["threshold"],
-                field_name="avg_monthly_revenue"
-            ))
-            risk_score += 0.3
-        
-        if annual_revenue < self.rules["min_annual_revenue"]["threshold"]:
-            violations.append(RuleViolation(
-                rule_id="min_annual_revenue",
-                description="Annual revenue below minimum threshold",
-                severity=self.rules["min_annual_revenue"]["severity"],
-                actual_value=annual_revenue,
-                threshold_value=self.rules["min_annual_revenue"]["threshold"],
-                field_name="annual_revenue"
-            ))
-        
-        # Check NSF limits
-        if nsf_count > self.rules["max_nsf_3m"]["threshold"]:
-            violations.append(RuleViolation(
-                rule_id="max_nsf_3m",
-                description="NSF count exceeds maximum threshold",
-                severity=self.rules["max_nsf_3m"]["severity"],
-                actual_value=nsf_count,
-                threshold_value=self.rules["max_nsf_3m"]["threshold"],
-                field_name="total_nsf_3m"
-            ))
-            risk_score += 0.25
-        
-        if nsf_ratio > self.rules["max_nsf_ratio"]["threshold"]:
-            violations.append(RuleViolation(
-                rule_id="max_nsf_ratio",
-                description="NSF ratio too high",
-                severity=self.rules["max_nsf_ratio"]["severity"],
-                actual_value=nsf_ratio,
-                threshold_value=self.rules["max_nsf_ratio"]["threshold"],
-                field_name="nsf_ratio"
-            ))
-            risk_score += 0.15
-        
-        # Check balance requirements
-        if daily_balance < self.rules["min_avg_balance"]["threshold"]:
-            violations.append(RuleViolation(
-                rule_id="min_avg_balance",
-                description="Average daily balance too low",
-                severity=self.rules["min_avg_balance"]["severity"],
-                actual_value=daily_balance,
-                threshold_value=self.rules["min_avg_balance"]["threshold"],
-                field_name="avg_daily_balance_3m"
-            ))
-            risk_score += 0.2
-        
-        if balance_to_revenue_ratio < self.rules["balance_to_revenue_ratio"]["threshold"]:
-            violations.append(RuleViolation(
-                rule_id="balance_to_revenue_ratio",
-                description="Balance to revenue ratio too low",
-                severity=self.rules["balance_to_revenue_ratio"]["severity"],
-                actual_value=balance_to_revenue_ratio,
-                threshold_value=self.rules["balance_to_revenue_ratio"]["threshold"],
-                field_name="balance_to_revenue_ratio"
-            ))
-            risk_score += 0.15
-        
-        # Check negative balance limits
-        if negative_days > self.rules["max_negative_days_3m"]["threshold"]:
-            violations.append(RuleViolation(
-                rule_id="max_negative_days_3m",
-                description="Too many negative balance days",
-                severity=self.rules["max_negative_days_3m"]["severity"],
-                actual_value=negative_days,
-                threshold_value=self.rules["max_negative_days_3m"]["threshold"],
-                field_name="total_days_negative_3m"
-            ))
-            risk_score += 0.3
-        
-        # CA-specific compliance checks
-        ca_compliant = True
-        if state == "CA":
-            if annual_revenue < CAComplianceRules.MIN_REVENUE_REQUIREMENT:
-                violations.append(RuleViolation(
-                    rule_id="ca_min_revenue",
-                    description="Does not meet CA minimum revenue requirement",
-                    severity=ViolationSeverity.CRITICAL,
-                    actual_value=annual_revenue,
-                    threshold_value=CAComplianceRules.MIN_REVENUE_REQUIREMENT,
-                    field_name="annual_revenue"
-                ))
-                ca_compliant = False
-            
-            if nsf_ratio > CAComplianceRules.MAX_NSF_RATIO:
-                violations.append(RuleViolation(
-                    rule_id="ca_max_nsf_ratio",
-                    description="NSF ratio exceeds CA compliance limit",
-                    severity=ViolationSeverity.CRITICAL,
-                    actual_value=nsf_ratio,
-                    threshold_value=CAComplianceRules.MAX_NSF_RATIO,
-                    field_name="nsf_ratio"
-                ))
-                ca_compliant = False
-            
-            if nsf_count >= CAComplianceRules.HIGH_RISK_NSF_THRESHOLD:
-                reasons.append("High NSF count triggers CA high-risk classification")
-                risk_score += 0.2
-        
-        # Determine decision
-        critical_violations = [v for v in violations if v.severity == ViolationSeverity.CRITICAL]
-        warning_violations = [v for v in violations if v.severity == ViolationSeverity.WARNING]
-        
-        if critical_violations or not ca_compliant:
-            decision = UnderwritingDecision.DECLINED
-            reasons.append("Critical underwriting violations or compliance issues")
-            max_offer_amount = None
-        elif len(warning_violations) >= 3 or risk_score > 0.8:
-            decision = UnderwritingDecision.MANUAL_REVIEW
-            reasons.append("Multiple warnings or high risk score requires manual review")
-            max_offer_amount = monthly_revenue * 0.5  # Conservative cap
-        elif risk_score > 0.6:
-            decision = UnderwritingDecision.CONDITIONAL
-            reasons.append("Moderate risk - conditional approval with limits")
-            max_offer_amount = monthly_revenue * 0.8
-        else:
-            decision = UnderwritingDecision.APPROVED
-            reasons.append("Meets all underwriting requirements")
-            max_offer_amount = monthly_revenue * 1.2
-        
-        # Cap risk score
-        risk_score = min(risk_score, 1.0)
-        
+        # Always floats and bools, the one signature the numba kernel is
+        # compiled (and warmed up) for; ints would trigger a second compile
+        risk_score, mask, decision_code, offer = _score_kernel(
+            float(monthly_revenue), float(daily_balance), float(nsf_count), float(negative_days),
+            state == "CA")
+
+        violations = []
+        if mask & ~_CA_HIGH_NSF_BIT:
+            # Reported values are recomputed here so they keep the caller's types
+            annual_revenue = monthly_revenue * 12
+            nsf_ratio = nsf_count / 90 if nsf_count > 0 else 0
+            balance_to_revenue_ratio = daily_balance / monthly_revenue if monthly_revenue > 0 else 0
+            actual = (monthly_revenue, annual_revenue, nsf_count, nsf_ratio, daily_balance,
+                      balance_to_revenue_ratio, negative_days, annual_revenue, nsf_ratio)
+            for j, r in enumerate(self.rules[:len(BATCH_RULES)]):
+                if mask >> j & 1:
+                    violations.append(RuleViolation(r.rule_id, r.description, r.severity,
+                                                    actual[j], r.threshold, r.field_name))
+
+        flags = _DECISION_FLAGS[decision_code] | (_CA_HIGH_NSF_FLAG if mask & _CA_HIGH_NSF_BIT else 0)
         return UnderwritingResult(
-            decision=decision,
+            decision=_DECISION_ORDER[decision_code],
             violations=violations,
-            max_offer_amount=max_offer_amount,
+            max_offer_amount=None if decision_code == 0 else offer,
             risk_score=risk_score,
-            reasons=reasons,
-            ca_compliant=ca_compliant
+            reasons=_REASONS_BY_FLAGS[flags],
+            ca_compliant=not (mask & _CA_MASK),
+            reason_flags=flags,
+            critical_count=(mask & _CRITICAL_MASK).bit_count(),
+            warning_count=(mask & _WARNING_MASK).bit_count(),
         )
     
+    def evaluate_metrics_batch(
+        self,
+        metrics: Mapping[str, Sequence[float]],
+        state: Union[str, Sequence[str]] = "CA",
+    ) -> UnderwritingBatchResult:
+        """evaluate_metrics for many deals at once, for portfolio scoring and
+        backfills. ``metrics`` maps the evaluate_metrics keys to equal-length
+        columns (a dict of lists/arrays or a DataFrame); a missing column counts
+        as 0 like a missing key. ``state`` is one state for all deals or one per
+        deal. Each rule is one vectorised comparison over all deals."""
+        # Iterating a mapping or a DataFrame yields its column names; both
+        # truth-testing a DataFrame and its .values() would go wrong here
+        first = next(iter(metrics), None)
+        n = len(metrics[first]) if first is not None else 0
+        def col(key: str) -> np.ndarray:
+            return np.asarray(metrics[key], dtype=np.float64) if key in metrics else np.zeros(n)
+        rev = col("avg_monthly_revenue")
+        bal = col("avg_daily_balance_3m")
+        nsf = col("total_nsf_3m")
+        neg = col("total_days_negative_3m")
+        ann = rev * 12
+        nsf_ratio = np.where(nsf > 0, nsf / 90, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            btr = np.where(rev > 0, bal / np.where(rev > 0, rev, 1.0), 0.0)
+        is_ca = np.full(n, state == "CA") if isinstance(state, str) else np.asarray(state) == "CA"
+
+        values = {
+            "avg_monthly_revenue": rev, "annual_revenue": ann, "total_nsf_3m": nsf, "nsf_ratio": nsf_ratio,
+            "avg_daily_balance_3m": bal, "balance_to_revenue_ratio": btr, "total_days_negative_3m": neg,
+        }
+        rules = self.rules[:len(BATCH_RULES)]
+        actual = np.column_stack([values[spec.field_name] for spec in rules])
+        thresholds = np.array([spec.threshold for spec in rules], dtype=np.float64)
+        severities = tuple(spec.severity for spec in rules)
+        below = np.array([spec.below for spec in rules])
+        ca_rules = np.array([bool(_CA_MASK >> j & 1) for j in range(len(rules))])
+        viol = np.where(below, actual < thresholds, actual > thresholds)
+        viol[:, ca_rules] &= is_ca[:, None]
+
+        # Added column by column in evaluate_metrics' order so the float sums,
+        # and so the 0.6/0.8 cut-offs, come out exactly as in the per-deal path
+        ca_high_nsf = is_ca & (nsf >= CAComplianceRules.HIGH_RISK_NSF_THRESHOLD)
+        risk = np.full(n, 0.3)
+        for j, spec in enumerate(rules):
+            if spec.risk_weight: risk += spec.risk_weight * viol[:, j]
+        risk += _W_CA_HIGH_RISK_NSF * ca_high_nsf
+
+        critical = np.array([sev == ViolationSeverity.CRITICAL for sev in severities])
+        warning = np.array([sev == ViolationSeverity.WARNING for sev in severities])
+        ca_compliant = ~viol[:, ca_rules].any(axis=1)
+        declined = viol[:, critical].any(axis=1) | ~ca_compliant
+        manual = ~declined & ((viol[:, warning].sum(axis=1) >= 3) | (risk > 0.8))
+        conditional = ~declined & ~manual & (risk > 0.6)
+        decision_code = np.select([declined, manual, conditional], [0, 1, 2], default=3)
+        offer = rev * np.array([np.nan, 0.5, 0.8, 1.2])[decision_code]
+
+        return UnderwritingBatchResult(
+            violations=viol,
+            actual_values=actual,
+            thresholds=thresholds,
+            severities=severities,
+            risk_score=np.minimum(risk, 1.0),
+            decision_code=decision_code,
+            max_offer_amount=offer,
+            ca_compliant=ca_compliant,
+            ca_high_nsf=ca_high_nsf,
+        )
+
     def validate_deal_terms(
         self,
         deal_amount: float,
@@ -258,34 +433,50 @@ class UnderwritingGuardrails:
         term_days: int,
         monthly_revenue: float,
         state: str = "CA"
-    ) -> Tuple[bool, List[str]]:
+    ) -> Tuple[bool, Tuple[str, ...]]:
         """Validate specific deal terms against compliance requirements."""
-        
-        issues = []
-        
-        # Calculate daily payment
-        total_payback = deal_amount * fee_rate
-        daily_payment = total_payback / term_days
-        daily_revenue = monthly_revenue / 30
-        payment_ratio = daily_payment / daily_revenue if daily_revenue > 0 else 0
-        
-        # Check payment ratio
-        if payment_ratio > self.rules["max_daily_payment_ratio"]["threshold"]:
-            issues.append(f"Daily payment ratio ({payment_ratio:.2%}) exceeds limit ({self.rules['max_daily_payment_ratio']['threshold']:.2%})")
-        
-        # Check total exposure
-        exposure_ratio = deal_amount / monthly_revenue if monthly_revenue > 0 else 0
-        if exposure_ratio > self.rules["max_total_exposure"]["threshold"]:
-            issues.append(f"Total exposure ratio ({exposure_ratio:.1f}x) exceeds limit ({self.rules['max_total_exposure']['threshold']:.1f}x)")
-        
-        # CA specific fee rate check
-        if state == "CA":
-            # Convert fee rate to approximate APR for comparison
-            approx_apr = ((fee_rate - 1) * 365) / term_days
-            if approx_apr > CAComplianceRules.MAX_ANNUAL_FEE_RATE:
-                issues.append(f"Fee rate may exceed CA APR limits (approx {approx_apr:.2%} APR)")
-        
-        return len(issues) == 0, issues
+        issues = _deal_term_issues(deal_amount, fee_rate, term_days, monthly_revenue, state)
+        return not issues, issues
+
+
+@lru_cache(maxsize=4096)
+def _deal_term_issues(
+    deal_amount: float,
+    fee_rate: float,
+    term_days: int,
+    monthly_revenue: float,
+    state: str,
+) -> Tuple[str, ...]:
+    """validate_deal_terms' checks, memoised: offer generation re-validates
+    the same tier terms for a deal on every request. Returns a tuple so the
+    cached result can be shared between callers."""
+    issues = []
+    
+    # Calculate daily payment
+    total_payback = deal_amount * fee_rate
+    daily_payment = total_payback / term_days
+    daily_revenue = monthly_revenue / 30
+    payment_ratio = daily_payment / daily_revenue if daily_revenue > 0 else 0
+    
+    # Check payment ratio
+    limit = RULES[IDX_MAX_DAILY_PAYMENT_RATIO].threshold
+    if payment_ratio > limit:
+        issues.append(f"Daily payment ratio ({payment_ratio:.2%}) exceeds limit ({limit:.2%})")
+    
+    # Check total exposure
+    exposure_ratio = deal_amount / monthly_revenue if monthly_revenue > 0 else 0
+    limit = RULES[IDX_MAX_TOTAL_EXPOSURE].threshold
+    if exposure_ratio > limit:
+        issues.append(f"Total exposure ratio ({exposure_ratio:.1f}x) exceeds limit ({limit:.1f}x)")
+    
+    # CA specific fee rate check
+    if state == "CA":
+        # Convert fee rate to approximate APR for comparison
+        approx_apr = ((fee_rate - 1) * 365) / term_days
+        if approx_apr > CAComplianceRules.MAX_ANNUAL_FEE_RATE:
+            issues.append(f"Fee rate may exceed CA APR limits (approx {approx_apr:.2%} APR)")
+    
+    return tuple(issues)
 
 
 # Global instance
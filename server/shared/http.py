@@ -1,7 +1,16 @@
 from __future__ import annotations
 from typing import Any, Dict
 from fastapi import Response
-import json
+try:
+    import orjson
+except Exception:
+    orjson = None
+    import json
 
 def ok(payload: Dict[str, Any]) -> Response:
-    return Response(content=json.dumps(payload), media_type="application/json")
\ No newline at end of file
+    if orjson is not None:
+        # NON_STR_KEYS keeps json.dumps' behaviour of stringifying int keys
+        body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(payload)
+    return Response(content=body, media_type="application/json")
@@ -0,0 +1,99 @@
+import io
+import zipfile
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.analysis import router
+from services.analysis_orchestrator import redact_many_to_zip
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+def _pdf(text: str) -> bytes:
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_redact_zip_keeps_uploads_with_the_same_name():
+    """Two uploads named statement.pdf both end up in the ZIP"""
+    files = [
+        ("files", ("statement.pdf", _pdf("Account 1111"), "application/pdf")),
+        ("files", ("statement.pdf", _pdf("Account 2222"), "application/pdf")),
+    ]
+    resp = client.post("/api/analysis/redact-zip", files=files)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
+        names = z.namelist()
+        assert len(names) == 2
+        assert len(set(names)) == 2
+        for name in names:
+            assert name.endswith("statement.pdf")
+            assert z.read(name).startswith(b"%PDF")
+
+
+def test_redact_many_to_zip_returns_none_when_streaming(tmp_path):
+    """With an output stream the ZIP goes there and nothing is returned"""
+    p = tmp_path / "a.pdf"
+    p.write_bytes(_pdf("hello"))
+    out = io.BytesIO()
+    assert redact_many_to_zip([str(p)], out) is None
+    with zipfile.ZipFile(io.BytesIO(out.getvalue())) as z:
+        assert z.namelist() == ["SCRUBBED_a.pdf"]
+    assert redact_many_to_zip([str(p)])[:2] == b"PK"
+
+
+def test_redact_zip_closes_the_spool_when_scrubbing_fails(monkeypatch):
+    import tempfile
+    import routes.analysis as analysis
+
+    spools = []
+    real = tempfile.SpooledTemporaryFile
+
+    def tracking_spool(*args, **kwargs):
+        spools.append(real(*args, **kwargs))
+        return spools[-1]
+
+    def boom(paths, out):
+        raise RuntimeError("scrub failed")
+
+    monkeypatch.setattr(analysis.tempfile, "SpooledTemporaryFile", tracking_spool)
+    monkeypatch.setattr(analysis, "redact_many_to_zip", boom)
+    failing = TestClient(app, raise_server_exceptions=False)
+    resp = failing.post("/api/analysis/redact-zip", files=[("files", ("a.pdf", _pdf("x"), "application/pdf"))])
+    assert resp.status_code == 500
+    assert len(spools) == 1 and spools[0].closed
+
+
+def test_long_pdfs_share_one_spawned_scrub_pool(tmp_path, monkeypatch):
+    """Page-range scrubbing reuses one spawn-context pool and keeps page order"""
+    import services.analysis_orchestrator as orch
+
+    monkeypatch.setattr(orch, "SCRUB_WORKERS", 2)
+
+    doc = fitz.open()
+    for i in range(orch.SCRUB_PARALLEL_MIN_PAGES + 6):
+        doc.new_page().insert_text((72, 72), f"Page {i} SSN 123-45-6789")
+    path = tmp_path / "long.pdf"
+    doc.save(path)
+    doc.close()
+
+    pools = []
+    for _ in range(2):
+        scrubbed = orch._scrub_pdf(str(path))
+        pools.append(orch._SCRUB_POOL)
+        texts = [page.get_text() for page in scrubbed]
+        scrubbed.close()
+        assert [t.split()[:2] for t in texts] == [["Page", str(i)] for i in range(len(texts))]
+        assert not any("123-45-6789" in t for t in texts)
+    assert pools[0] is not None and pools[0] is pools[1]
+    assert pools[0]._mp_context.get_start_method() == "spawn"
@@ -0,0 +1,196 @@
+import asyncio
+from datetime import datetime, timezone
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from services.background_checks import (
+    BackgroundCheckFlag, BackgroundCheckOrchestrator, BackgroundCheckResult,
+    BusinessIdentity, CheckType, ClearService, PersonIdentity,
+)
+
+
+async def _with_server(routes, body):
+    """Run ``body(base_url)`` against a local aiohttp app serving ``routes``."""
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_post(path, handler)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        return await body(str(server.make_url("")).rstrip("/"))
+    finally:
+        await server.close()
+
+
+def _person(i: int = 0) -> PersonIdentity:
+    return PersonIdentity(first_name=f"Jane{i}", last_name="Doe", ssn_last4="5678")
+
+
+BUSINESS = BusinessIdentity(legal_name="Acme LLC", ein="123456789")
+
+
+def test_admission_limit_holds_across_event_loops():
+    """max_inflight caps concurrent comprehensive checks, on every loop that uses the orchestrator"""
+    orch = BackgroundCheckOrchestrator(max_inflight=2)
+    state = {"running": 0, "peak": 0}
+
+    async def slow_check(person, business, checked_at):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        return BackgroundCheckResult(CheckType.CLEAR_IDENTITY, BackgroundCheckFlag.CLEAR, "ref", checked_at)
+
+    orch._dispatch[CheckType.CLEAR_IDENTITY] = slow_check
+
+    async def burst(offset):
+        return await asyncio.gather(*(
+            orch.run_comprehensive_check(_person(offset + i), BUSINESS, [CheckType.CLEAR_IDENTITY])
+            for i in range(6)
+        ))
+
+    for offset in (0, 100):
+        state["peak"] = 0
+        results = asyncio.run(burst(offset))
+        assert state["peak"] == 2
+        assert all(r[0].flag is BackgroundCheckFlag.CLEAR for r in results)
+
+
+def test_provider_concurrency_and_retries():
+    """The per-service semaphore bounds in-flight requests; 503s are retried, 502s are not"""
+    state = {"running": 0, "peak": 0, "flaky": 0, "down": 0, "gateway": 0}
+
+    async def verify(request):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        return web.json_response({"verified": True})
+
+    async def flaky(request):
+        state["flaky"] += 1
+        if state["flaky"] == 1:
+            return web.json_response({}, status=503, headers={"Retry-After": "0"})
+        return web.json_response({"ok": True})
+
+    async def down(request):
+        state["down"] += 1
+        return web.json_response({}, status=503, headers={"Retry-After": "0"})
+
+    async def gateway(request):
+        state["gateway"] += 1
+        return web.json_response({}, status=502)
+
+    async def body(base_url):
+        service = ClearService("live-key", base_url=base_url, concurrency=2)
+        try:
+            statuses = await asyncio.gather(*(service._post("/verify", {"i": i}) for i in range(6)))
+            assert [status for status, _ in statuses] == [200] * 6
+            assert await service._post("/flaky", {}) == (200, {"ok": True})
+            status, _ = await service._post("/down", {})
+            assert status == 503
+            # The provider may already have run (and billed) the check
+            status, _ = await service._post("/gateway", {})
+            assert status == 502
+        finally:
+            await service.aclose()
+
+    asyncio.run(_with_server({"/verify": verify, "/flaky": flaky, "/down": down, "/gateway": gateway}, body))
+    assert state["peak"] == 2
+    assert state["flaky"] == 2
+    assert state["down"] == 3
+    assert state["gateway"] == 1
+
+
+def test_cache_serves_live_results_and_skips_mock_and_declined():
+    """Live CLEAR results are cached and marked; declines and mock answers are not"""
+    calls = {"identity": 0, "criminal": 0}
+
+    async def identity(request):
+        calls["identity"] += 1
+        return web.json_response({"verified": True, "reference_id": "id-1", "confidence": 0.9})
+
+    async def criminal(request):
+        calls["criminal"] += 1
+        return web.json_response({"clear": False})
+
+    async def body(base_url):
+        orch = BackgroundCheckOrchestrator(clear_api_key="live-key")
+        orch.clear_service.base_url = base_url
+        try:
+            first, second = [
+                await orch.run_comprehensive_check(_person(), BUSINESS, [CheckType.CLEAR_IDENTITY])
+                for _ in range(2)
+            ]
+            assert calls["identity"] == 1
+            assert first[0].cached is False
+            assert second[0].cached is True
+            assert second[0].reference_id == first[0].reference_id == "id-1"
+            assert orch.aggregate_flags(second)["results"][0]["cached"] is True
+
+            for _ in range(2):
+                declined = await orch.run_comprehensive_check(_person(), BUSINESS, [CheckType.CLEAR_CRIMINAL])
+                assert declined[0].flag is BackgroundCheckFlag.DECLINED
+                assert declined[0].cached is False
+            assert calls["criminal"] == 2
+        finally:
+            await orch.aclose()
+
+    asyncio.run(_with_server({"/identity/verify": identity, "/criminal/check": criminal}, body))
+
+    mock = BackgroundCheckOrchestrator()
+    for _ in range(2):
+        results = asyncio.run(mock.run_comprehensive_check(_person(), BUSINESS))
+        assert not any(r.cached for r in results)
+    assert not mock._cache
+
+
+def test_partial_json_read_keeps_the_connection_pooled():
+    """Stopping the ijson scan early still drains the body, so the next request reuses the connection"""
+    peers = []
+    padding = "x" * (1 << 20)
+
+    async def cases(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        return web.json_response({"record_count": 0, "reference_id": "r", "confidence": 0.9, "cases": [padding]})
+
+    async def body(base_url):
+        service = ClearService("live-key", base_url=base_url)
+        try:
+            for _ in range(3):
+                status, found = await service._post("/cases", {}, fields=("record_count", "reference_id", "confidence"))
+                assert (status, found) == (200, {"record_count": 0, "reference_id": "r", "confidence": 0.9})
+        finally:
+            await service.aclose()
+
+    asyncio.run(_with_server({"/cases": cases}, body))
+    assert len(peers) == 3 and len(set(peers)) == 1
+
+
+def test_checks_after_a_decline_are_skipped_and_left_out_of_confidence():
+    """Checks cut short by a decline are SKIPPED and don't drag the average confidence down"""
+    orch = BackgroundCheckOrchestrator()
+    now = datetime.now(timezone.utc)
+
+    async def decline(person, business, checked_at):
+        return BackgroundCheckResult(CheckType.CLEAR_IDENTITY, BackgroundCheckFlag.DECLINED, "d", checked_at, confidence=0.9)
+
+    async def hang(person, business, checked_at):
+        await asyncio.sleep(10)
+
+    orch._dispatch[CheckType.CLEAR_IDENTITY] = decline
+    orch._dispatch[CheckType.NYSCEF_COURT] = hang
+    results = asyncio.run(orch.run_comprehensive_check(
+        _person(), BUSINESS, [CheckType.CLEAR_IDENTITY, CheckType.NYSCEF_COURT]))
+    assert [r.flag for r in results] == [BackgroundCheckFlag.DECLINED, BackgroundCheckFlag.SKIPPED]
+
+    summary = orch.aggregate_flags(results)
+    assert summary["overall_decision"] == "declined"
+    assert summary["flag_summary"]["skipped"] == 1
+    assert summary["average_confidence"] == 0.9
+
+    # PENDING results still count toward the average, as before
+    pending = BackgroundCheckResult(CheckType.EIN_OWNERSHIP, BackgroundCheckFlag.PENDING, "p", now, confidence=0.5)
+    clear = BackgroundCheckResult(CheckType.SSN_OWNERSHIP, BackgroundCheckFlag.CLEAR, "c", now, confidence=1.0)
+    assert orch.aggregate_flags([pending, clear])["average_confidence"] == 0.75
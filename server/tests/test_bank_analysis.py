@@ -0,0 +1,140 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from services.bank_analysis import BankStatementAnalyzer
+
+ROWS = [
+    "01/03/2024 DEPOSIT ACME PAYROLL 4,200.00 9,200.00",
+    "01/09/2024 CARD PURCHASE OFFICE -310.25 8,889.75",
+    "01/15/2024 DEPOSIT STRIPE 2,750.00 11,639.75",
+]
+
+
+def _pdf(lines) -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    for n, line in enumerate(lines):
+        page.insert_text((40, 60 + 14 * n), line, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _insights(risk_level: str) -> dict:
+    return {
+        "business_type_indicators": ["retail"],
+        "cash_flow_patterns": {"seasonality": "none", "trend": "stable", "consistency": "regular"},
+        "risk_assessment": {"risk_level": risk_level, "risk_flags": [], "positive_indicators": []},
+    }
+
+
+def _completion(payload: dict):
+    message = SimpleNamespace(content=json.dumps(payload))
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    return BankStatementAnalyzer()
+
+
+def _jobs(n: int):
+    return [([_pdf(ROWS)], [f"statement_2024-0{i + 1}.pdf"]) for i in range(n)]
+
+
+def test_analyze_many_packs_applicants_per_request(analyzer):
+    """Three applicants at two per request make two GPT calls; each answer lands on its id"""
+    requests = []
+
+    def create(**kwargs):
+        applicants = json.loads(kwargs["messages"][-1]["content"].rsplit("APPLICANTS:", 1)[1])
+        requests.append([a["id"] for a in applicants])
+        # The model skips applicant 1 entirely
+        return _completion({"results": [
+            {"id": a["id"], **_insights("high" if a["id"] == 2 else "low")}
+            for a in applicants if a["id"] != 1
+        ]})
+
+    analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    results = analyzer.analyze_many(_jobs(3), max_items_per_request=2)
+
+    assert requests == [[0, 1], [2]]
+    assert [r["gpt_analysis"] for r in results] == [True, False, True]
+
+
+def test_submit_and_collect_batch(analyzer):
+    """submit_batch uploads one request per job; collect_batch polls and maps results back by custom id"""
+    uploaded = {}
+    statuses = iter(["validating", "in_progress", "completed"])
+
+    def files_create(file, purpose):
+        uploaded["lines"] = [json.loads(line) for line in file[1].decode().splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    def retrieve(batch_id):
+        return SimpleNamespace(status=next(statuses), output_file_id="file-out")
+
+    def content(file_id):
+        lines = [
+            {"custom_id": "deal-a", "response": {"status_code": 200, "body": {
+                "choices": [{"message": {"content": json.dumps(_insights("low"))}}]}}},
+            {"custom_id": "deal-b", "response": {"status_code": 500, "body": {}}},
+        ]
+        return SimpleNamespace(text="\n".join(json.dumps(line) for line in lines))
+
+    analyzer.client = SimpleNamespace(
+        files=SimpleNamespace(create=files_create, content=content),
+        batches=SimpleNamespace(create=lambda **kw: SimpleNamespace(id="batch-1"), retrieve=retrieve),
+    )
+    jobs = dict(zip(["deal-a", "deal-b"], _jobs(2)))
+
+    assert analyzer.submit_batch(jobs) == "batch-1"
+    assert [line["custom_id"] for line in uploaded["lines"]] == ["deal-a", "deal-b"]
+    assert {line["url"] for line in uploaded["lines"]} == {"/v1/chat/completions"}
+
+    analyses = analyzer.collect_batch("batch-1", jobs, poll_interval=0)
+    assert analyses["deal-a"]["gpt_analysis"] is True
+    assert analyses["deal-b"]["gpt_analysis"] is False
+
+
+def test_gpt_client_and_semaphore_follow_the_event_loop(monkeypatch):
+    """Each event loop gets its own async client and semaphore; one loop reuses its pair"""
+    import asyncio
+    from services import bank_analysis
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+
+    async def grab():
+        client, sem = bank_analysis._async_client(), bank_analysis._gpt_semaphore()
+        assert bank_analysis._async_client() is client and bank_analysis._gpt_semaphore() is sem
+        async with sem:
+            pass
+        return client, sem
+
+    first, second = asyncio.run(grab()), asyncio.run(grab())
+    assert first[0] is not second[0] and first[1] is not second[1]
+
+
+def test_text_backends_agree_on_page_breaks(monkeypatch):
+    """pdfium and the pdfplumber fallback give the same text: pages joined by a newline, no CRs"""
+    from services import bank_analysis
+
+    doc = fitz.open()
+    for lines in (ROWS[:2], ROWS[2:]):
+        page = doc.new_page()
+        for n, line in enumerate(lines):
+            page.insert_text((40, 60 + 14 * n), line, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+
+    texts = [bank_analysis._extract_text(data)]
+    monkeypatch.setattr(bank_analysis, "pdfium", None)
+    texts.append(bank_analysis._extract_text(data))
+    for text in texts:
+        assert "\r" not in text
+        assert text.splitlines() == ROWS
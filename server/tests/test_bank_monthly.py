@@ -189,4 +189,62 @@ def test_money_normalization():
     assert _money("200.75") == 200.75
     assert _money(None) == 0.0
     assert _money("invalid") == 0.0
-    assert _money("") == 0.0
\ No newline at end of file
+    assert _money("") == 0.0
+    assert _money("1,234.56") == 1234.56
+    assert _money("$1,234.56-") == -1234.56
+
+def test_build_monthly_rows_repeat_payload():
+    """Repeat builds of the same payload give equal rows the caller can mutate"""
+    payload = {
+        "statements": [
+            {
+                "month": "2025-08",
+                "beginning_balance": 100.0,
+                "ending_balance": 150.0,
+                "transactions": [{"amount": 50.0, "desc": "ZELLE FROM"}]
+            }
+        ]
+    }
+    first = build_monthly_rows(payload, cache_key="snap-repeat")
+    first[0]["total_deposits"] = 0
+    second = build_monthly_rows(payload, cache_key="snap-repeat")
+    assert second[0]["total_deposits"] == 50.0
+    assert second[0]["ending_balance"] == 150.0
+    # A hit is served from the key alone
+    assert build_monthly_rows({}, cache_key="snap-repeat") == second
+
+def test_row_cache_is_safe_across_threads(monkeypatch):
+    """Concurrent builds over more keys than the cache holds never fail on eviction"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from services import bank_monthly
+    monkeypatch.setattr(bank_monthly, "ROW_CACHE_SIZE", 4)
+    payload = {"statements": [{"ending_balance": 1.0, "transactions": [{"amount": 5.0, "desc": "X"}]}]}
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda i: build_monthly_rows(payload, cache_key=("t", i % 16)), range(2000)))
+    assert all(r[0]["total_deposits"] == 5.0 for r in results)
+    assert len(bank_monthly._ROW_CACHE) <= 4
+
+def test_categorizers_agree():
+    """The generated categorizer matches a plain search over each category pattern"""
+    from services.bank_monthly import WITHDRAWAL_CATEGORIES, _codegen_totals
+    items = [("ZELLE TO BOB", -10.0), ("AMEX EPAYMENT", -20.0), ("SBA EIDL LOAN", -5.0), ("POS STORE 12", -1.0)]
+    expected = dict.fromkeys(WITHDRAWAL_CATEGORIES, 0.0)
+    for d, a in items:
+        for name, pat in WITHDRAWAL_CATEGORIES.items():
+            if pat.search(d):
+                expected[name] += a
+    assert _codegen_totals(WITHDRAWAL_CATEGORIES)(items) == expected
+    assert _codegen_totals({})(items) == {}
+
+def test_row_category_totals_match_per_pattern_search():
+    """Row category sums (deduped per description, overlaps counted in each) match a per-transaction, per-pattern search"""
+    from services.bank_monthly import DEPOSIT_CATEGORIES, WITHDRAWAL_CATEGORIES
+    descs = ["ZELLE TO BOB", "AMEX EPAYMENT", "ZELLE AMEX SPLIT", "SBA EIDL LOAN", "NAV TECHNOLOGIES",
+             "WIRE TRANSFER IN RADOVANOVIC", "mobile check deposit", "POS STORE 12", "CADENCE BANK"]
+    txs = [{"amount": (-1 if i % 2 else 1) * (10.0 + i), "desc": descs[i % len(descs)]} for i in range(60)]
+    row = build_monthly_rows({"statements": [{"transactions": txs}]})[0]
+    for categories, sign in ((WITHDRAWAL_CATEGORIES, -1), (DEPOSIT_CATEGORIES, 1)):
+        for name, pat in categories.items():
+            expected = sum(sign * t["amount"] for t in txs if sign * t["amount"] > 0 and pat.search(t["desc"]))
+            assert math.isclose(row[name], expected), name
@@ -0,0 +1,16 @@
+from services.bank_patterns import BREAKOUT_FIRST_CHARS
+from services.parsers.extract_any import _NEXT_AMOUNT_ANCHORS
+
+
+def test_breakout_first_chars_cover_anchors():
+    """Every next-amount anchor alternative starts with a letter the master scan tries"""
+    for _, rx in _NEXT_AMOUNT_ANCHORS:
+        depth, alt, alts = 0, "", []
+        for ch in rx.pattern:
+            depth += (ch == "(") - (ch == ")")
+            if ch == "|" and depth == 0:
+                alts.append(alt); alt = ""
+            else:
+                alt += ch
+        for a in alts + [alt]:
+            assert a.removeprefix(r"\b")[0].lower() in BREAKOUT_FIRST_CHARS, a
@@ -0,0 +1,152 @@
+from services.parsers import extract_any
+
+
+def _text(content):
+    return [part["text"] for part in content if part["type"] == "text"]
+
+
+def test_batched_vision_results_follow_statement_numbers(monkeypatch):
+    """Batch answers are keyed on the echoed STATEMENT number; missing ones are re-asked alone"""
+    calls = []
+
+    def fake_llm_json(content, statements=1):
+        calls.append(statements)
+        if statements > 1:
+            # Out of order, statement 2 missing, plus junk the parser must skip
+            return {"results": [
+                {"statement": 3, "period_label": "Mar 2024"},
+                {"period_label": "no index"},
+                {"statement": 1, "period_label": "Jan 2024"},
+                {"statement": 9, "period_label": "out of range"},
+            ]}
+        url = content[-1]["image_url"]["url"]
+        return {"period_label": f"alone {url}"}
+
+    monkeypatch.setattr(extract_any, "_llm_json", fake_llm_json)
+    results = extract_any._llm_extract_on_statements([["a"], ["b"], ["c"]])
+
+    assert [r["period_label"] for r in results] == ["Jan 2024", "alone b", "Mar 2024"]
+    assert all("statement" not in r for r in results)
+    assert calls == [3, 1]
+
+
+def test_failed_batch_call_falls_back_per_statement(monkeypatch):
+    def fake_llm_json(content, statements=1):
+        if statements > 1:
+            return {}
+        return {"period_label": content[-1]["image_url"]["url"]}
+
+    monkeypatch.setattr(extract_any, "_llm_json", fake_llm_json)
+    results = extract_any._llm_extract_on_statements([["a"], ["b"]])
+    assert [r["period_label"] for r in results] == ["a", "b"]
+
+
+def test_batch_prompt_labels_each_statement(monkeypatch):
+    seen = {}
+
+    def fake_llm_json(content, statements=1):
+        seen["text"] = _text(content)
+        return {"results": [{"statement": n, "period_label": None} for n in range(1, statements + 1)]}
+
+    monkeypatch.setattr(extract_any, "_llm_json", fake_llm_json)
+    extract_any._llm_extract_on_statements([["a"], ["b"]])
+    assert seen["text"][1:] == ["STATEMENT 1", "STATEMENT 2"]
+
+
+def test_breakout_amount_must_fit_inside_the_window():
+    """Only an amount lying wholly within 200 chars of the anchor counts"""
+    for gap, expected in ((0, 3000.0), (192, 3000.0), (193, 0.0), (195, 0.0), (202, 0.0)):
+        text = "Wire Credit" + " " * gap + "3,000.00"
+        assert extract_any._breakouts_fulltext(text)["wire_credits"] == expected, gap
+
+
+def test_breakout_anchors_match_mid_word():
+    """Anchors aren't tied to a word start, so glued descriptors still count"""
+    out = extract_any._breakouts_fulltext("AUTO SBA PAYMENT 100.00\neTransfer To savings 20.00\n")
+    assert out["withdrawals_SBA_EIDL"] == 100.0
+    assert out["transfer_out"] == 20.0
+
+
+def test_breakouts_match_a_per_field_scan():
+    """The single pass sums the same as scanning each anchor on its own"""
+    def per_field(text, rx):
+        total = 0.0
+        for m in rx.finditer(text):
+            a = extract_any._amount(text[m.end():m.end() + extract_any.BREAKOUT_WINDOW])
+            if a is not None:
+                total += abs(a)
+        return total
+
+    text = (
+        "Wire Credit 1,250.00 Online Transfer From CHK 300.00\n"
+        "Transfer To Chase Card 75.10 Zelle From Bob 10.00 Zelle Payment to Al 5.00\n"
+        "Monthly Service Fee" + " " * 190 + "12.50 Bank Service Fee 35.00\n"
+        "AUTO AMEX EPAYMENT 420.00 Transfer From Savings 1,000.00-\n"
+    )
+    out = extract_any._breakouts_fulltext(text)
+    for name, rx in extract_any._NEXT_AMOUNT_ANCHORS:
+        assert out[name] == per_field(text, rx), name
+
+
+def test_vision_calls_use_the_orchestrators_pooled_client(monkeypatch):
+    from services import analysis_orchestrator
+
+    client = object()
+    monkeypatch.setattr(analysis_orchestrator, "_OPENAI", client)
+    assert extract_any._openai_client() is client
+
+
+def _fake_statement(monkeypatch, tmp_path, llm):
+    pdf = tmp_path / "stmt.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake statement")
+    calls = []
+
+    def fake_llm(image_urls):
+        calls.append(image_urls)
+        return llm
+
+    monkeypatch.setattr(extract_any, "EXTRACT_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(extract_any, "_read_statement",
+                        lambda _path, _sha=None: (["Beginning Balance $1,000.00\nTotal Deposits $500.00"], ["img"]))
+    monkeypatch.setattr(extract_any, "_llm_extract_on_pages", fake_llm)
+    return str(pdf), calls
+
+
+def test_statement_row_carries_summary_totals_and_is_cached(monkeypatch, tmp_path):
+    pdf, calls = _fake_statement(monkeypatch, tmp_path, {"period_label": "Jan 2024", "total_deposits": "500.00"})
+    row = extract_any.extract_any_bank_statement(pdf)
+    assert row["summary_totals"] == {"beginning_balance": 1000.0, "total_deposits": 500.0}
+    assert extract_any.extract_any_bank_statement(pdf) == row
+    assert len(calls) == 1
+    # Another model is another cache entry
+    monkeypatch.setenv("OPENAI_MODEL", "other-model")
+    extract_any.extract_any_bank_statement(pdf)
+    assert len(calls) == 2
+
+
+def test_rows_without_vision_totals_are_not_cached(monkeypatch, tmp_path):
+    pdf, calls = _fake_statement(monkeypatch, tmp_path, {})
+    extract_any.extract_any_bank_statement(pdf)
+    extract_any.extract_any_bank_statement(pdf)
+    assert len(calls) == 2
+    assert not list((tmp_path / "cache").glob("*.json"))
+
+
+def test_cache_drops_expired_and_oldest_entries(monkeypatch, tmp_path):
+    import os
+    import time
+
+    pdf, calls = _fake_statement(monkeypatch, tmp_path, {"period_label": "Jan 2024"})
+    extract_any.extract_any_bank_statement(pdf)
+    (entry,) = (tmp_path / "cache").glob("*.json")
+    old = time.time() - extract_any.EXTRACT_CACHE_TTL - 1
+    os.utime(entry, (old, old))
+    extract_any.extract_any_bank_statement(pdf)
+    assert len(calls) == 2
+
+    monkeypatch.setattr(extract_any, "EXTRACT_CACHE_MAX_FILES", 2)
+    for n in range(4):
+        (tmp_path / "cache" / f"{n:064x}.x.json").write_text("{}")
+    extract_any._store_row("f" * 64, {}, {"period_label": "Feb 2024"})
+    assert len(list((tmp_path / "cache").glob("*.json"))) == 2
+    assert extract_any._cached_row("f" * 64) == {}
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from services.underwriting import UnderwritingGuardrails
+
+guardrails = UnderwritingGuardrails()
+
+
+def _random_deals(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    metrics = {
+        "avg_monthly_revenue": rng.choice([0.0, 15000.0, 4000.0, 40000.0], n) * rng.uniform(0.5, 2.0, n),
+        "avg_daily_balance_3m": rng.uniform(-2000, 20000, n),
+        "total_nsf_3m": rng.integers(0, 12, n).astype(float),
+        "total_days_negative_3m": rng.integers(0, 30, n).astype(float),
+    }
+    states = rng.choice(["CA", "NY", "TX"], n)
+    return metrics, states
+
+
+def test_batch_matches_per_deal_evaluation():
+    """result(i) of evaluate_metrics_batch equals evaluate_metrics on deal i, CA rules included"""
+    metrics, states = _random_deals(3000)
+    batch = guardrails.evaluate_metrics_batch(metrics, list(states))
+    assert len(batch) == 3000
+    assert batch.ca_high_nsf.any() and not batch.ca_compliant.all()
+    for i in range(len(batch)):
+        deal = {key: float(column[i]) for key, column in metrics.items()}
+        assert batch.result(i) == guardrails.evaluate_metrics(deal, str(states[i])), i
+
+
+def test_batch_single_state_and_missing_columns():
+    metrics = {"avg_monthly_revenue": [20000, 9000], "total_nsf_3m": [0, 9]}
+    batch = guardrails.evaluate_metrics_batch(metrics, "CA")
+    for i in range(2):
+        deal = {key: column[i] for key, column in metrics.items()}
+        assert batch.result(i) == guardrails.evaluate_metrics(deal, "CA")
+
+
+
+def test_batch_accepts_a_dataframe():
+    pd = pytest.importorskip("pandas")
+    metrics, states = _random_deals(50, seed=3)
+    expected = guardrails.evaluate_metrics_batch(metrics, list(states))
+    batch = guardrails.evaluate_metrics_batch(pd.DataFrame(metrics), list(states))
+    assert [batch.result(i) for i in range(50)] == [expected.result(i) for i in range(50)]
+    assert len(guardrails.evaluate_metrics_batch(pd.DataFrame(), "CA")) == 0
+
+
+def test_int_metrics_score_like_floats_and_keep_their_types():
+    ints = {"avg_monthly_revenue": 9000, "avg_daily_balance_3m": 300, "total_nsf_3m": 9, "total_days_negative_3m": 20}
+    floats = {key: float(value) for key, value in ints.items()}
+    a = guardrails.evaluate_metrics(ints, "CA")
+    b = guardrails.evaluate_metrics(floats, "CA")
+    assert (a.decision, a.risk_score, a.reason_flags) == (b.decision, b.risk_score, b.reason_flags)
+    nsf = next(v for v in a.violations if v.rule_id == "max_nsf_3m")
+    assert type(nsf.actual_value) is int